@@ -1,84 +1,346 @@
 from langchain.chains import LLMChain
 from langchain_groq import ChatGroq
-from utils.prompts import SOURCING_PROMPT
+from utils.prompts import SOURCING_PROMPT, PROMPT_VERSION
 from utils.database import VectorDatabase
 from utils.external_sourcing import ExternalSourcer
+from utils.identity import IdentityResolver
+from utils.search_index import tokenize
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+import hashlib
+import json
 import os
-from typing import Dict, List, Any
+import queue
+import re
+import threading
+import time
+from typing import Dict, List, Any, Tuple, Callable, Iterator, Optional
 from dotenv import load_dotenv
 load_dotenv()
 
+
+def canonicalize_queries(text: str) -> List[str]:
+    """Search queries from raw LLM output, one per line.
+
+    List numbering, bullets and quotes are stripped, and blank lines and
+    preamble lines ending in ':' are dropped. Near-duplicates, i.e. queries
+    with the same set of search tokens, are dropped too; tokens come from
+    the search index tokenizer, so "C++ developer" and "C# developer" stay
+    distinct.
+    """
+    queries = []
+    seen = set()
+    for line in text.split('\n'):
+        query = re.sub(r'^\s*(?:\d+[.):]|[-*\u2022])\s*', '', line)
+        query = ' '.join(query.strip().strip('"\'`').split())
+        if not query or query.endswith(':'):
+            continue
+        key = frozenset(tokenize(query))
+        if key and key not in seen:
+            seen.add(key)
+            queries.append(query)
+    return queries
+
+
 class SourcingAgent:
-    def __init__(self):
+    def __init__(self, db: Optional[VectorDatabase] = None, external_sourcer: Optional[ExternalSourcer] = None):
+        self.model_name = "gemma2-9b-it"
         self.llm = ChatGroq(
-            model_name="gemma2-9b-it",
+            model_name=self.model_name,
             temperature=0.7,
             groq_api_key=os.getenv("GROQ_API_KEY")
         )
         self.chain = SOURCING_PROMPT | self.llm
-        self.db = VectorDatabase()
-        self.external_sourcer = ExternalSourcer()
+        # Both can be passed in, e.g. to run against a scratch database or a simulated API (see benchmarks/)
+        self.db = db or VectorDatabase(
+            storage=os.getenv("TALENT_DB_STORAGE", "json"),
+            search_mode=os.getenv("TALENT_DB_SEARCH_MODE", "vector")
+        )
+        self.external_sourcer = external_sourcer or ExternalSourcer()
+        self.identity_resolver = IdentityResolver()
+        # Generated queries are memoized in the sourcing cache, keyed by the job content
+        self.query_cache_ttl = float(os.getenv("SOURCING_QUERY_CACHE_TTL", str(7 * 24 * 3600)))
+        # GitHub lookups run side by side, as many as the sourcer's enrichment pool is sized for
+        self._query_executor = ThreadPoolExecutor(
+            max_workers=self.external_sourcer.parallel_queries, thread_name_prefix="sourcing-query"
+        )
+        # Database lookups have their own pool so they never queue behind slow GitHub ones
+        self._database_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("SOURCING_DATABASE_WORKERS", "2")), thread_name_prefix="sourcing-database"
+        )
+        # New candidates are persisted by a single background writer, off the request path
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sourcing-writer")
+        self._pending_writes: List[Future] = []
+
+    def source_candidates(self, job_description: str, requirements: str, max_results: int = 10) -> Dict[str, Any]:
+        """Generate search queries and find potential candidates, up to `max_results` per source and query"""
+        for event in self.iter_source_candidates(job_description, requirements, max_results):
+            if event["type"] == "done":
+                return {
+                    "search_queries": event["search_queries"],
+                    "candidates": event["candidates"],
+                    "query_timings": event["query_timings"]
+                }
+
+    def iter_source_candidates(self, job_description: str, requirements: str,
+                               max_results: int = 10) -> Iterator[Dict[str, Any]]:
+        """Like source_candidates, but yields progress events and candidates as soon as they are ready.
 
-    def source_candidates(self, job_description: str, requirements: str) -> Dict[str, Any]:
-        """Generate search queries and find potential candidates"""
+        Every event has a "type" and a "progress" fraction (finished source
+        lookups over all of them):
+
+        - "queries": the search queries about to run
+        - "query_started": the first lookup for "query" began
+        - "candidate": a newly seen candidate, GitHub ones already enriched,
+          with the "query" and "source" that found it
+        - "source_finished": one source finished one query, with "status"
+          ("ok", "error" or "timeout"), "count", "seconds" and "error" if it
+          failed
+        - "done": the final payload of source_candidates. Its "candidates"
+          are merged across ids and sources and ordered by query (GitHub,
+          then the internal database), so they can differ from the stream
+
+        Every lookup must finish within the sourcer's `source_deadline`
+        (SOURCING_DEADLINE_SECONDS) of starting to run; time spent queued for
+        a worker does not count. One still running then is reported as a
+        timeout, keeping what it yielded so far, and is told to stop before
+        its next search page or enrichment window. A throttled GitHub query
+        therefore cannot hold up the page behind rate-limit backoff, nor keep
+        its worker busy for the searches after it. Database lookups run on
+        their own pool, so they are never stuck behind GitHub ones.
+
+        New external candidates are saved in the background after "done".
+        If the caller stops early, lookups still running are told to stop.
+        """
         # For direct search queries, skip LLM
         if job_description == requirements:
             search_queries = [job_description]
         else:
-            # Get search queries from LLM
-            response = self.chain.invoke({
-                "job_description": job_description,
-                "requirements": requirements
-            })
-            search_queries = response.content.split('\n') if hasattr(response, 'content') else str(response).split('\n')
-        
+            search_queries = self.generate_search_queries(job_description, requirements)
+
+        queries = [query.strip() for query in search_queries if query.strip()]
+        lookups = [("GitHub", self._iter_github, self._query_executor),
+                   ("Internal Database", self._iter_database, self._database_executor)]
+        total = len(queries) * len(lookups)
+        yield {"type": "queries", "queries": queries, "progress": 0.0 if total else 1.0}
+
+        # Queries run side by side, each query's lookups overlapped; workers report through the queue
+        events: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        cancel: Dict[Tuple[int, str], threading.Event] = {}
+        fan_out_start = time.perf_counter()
+        for index, query in enumerate(queries):
+            for source, iterate, executor in lookups:
+                cancel[(index, source)] = threading.Event()
+                executor.submit(self._stream_lookup, events, cancel[(index, source)], index, query, source, iterate,
+                                max_results)
+
+        found: Dict[Tuple[int, str], List[Dict[str, Any]]] = {}
+        finished: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        # Lookups that started running -> when they did; each one's deadline counts from there
+        running: Dict[Tuple[int, str], float] = {}
+        started = set()
+        seen_ids = set()
+        deadline = self.external_sourcer.source_deadline
+        try:
+            while len(finished) < total:
+                timeout = None
+                if running:
+                    timeout = max(0.0, min(running.values()) + deadline - time.perf_counter())
+                try:
+                    event = events.get(timeout=timeout)
+                except queue.Empty:
+                    event = None
+
+                if event is not None and (event["query_index"], event["source"]) not in finished:
+                    slot = (event["query_index"], event["source"])
+                    if event["type"] == "started":
+                        running[slot] = event["started_at"]
+                        if event["query_index"] not in started:
+                            started.add(event["query_index"])
+                            yield {"type": "query_started", "query": event["query"],
+                                   "progress": len(finished) / total}
+                    elif event["type"] == "candidate":
+                        candidate = event["candidate"]
+                        found.setdefault(slot, []).append(candidate)
+                        candidate_id = str(candidate.get('id', ''))
+                        if candidate_id and candidate_id not in seen_ids:
+                            seen_ids.add(candidate_id)
+                            yield {"type": "candidate", "query": event["query"], "source": event["source"],
+                                   "candidate": candidate, "progress": len(finished) / total}
+                    else:
+                        running.pop(slot, None)
+                        finished[slot] = event
+                        finished_event = {"type": "source_finished", "query": event["query"],
+                                          "source": event["source"], "status": event["status"],
+                                          "count": event["count"], "seconds": event["seconds"],
+                                          "progress": len(finished) / total}
+                        if "error" in event:
+                            finished_event["error"] = event["error"]
+                        yield finished_event
+
+                # Give up on lookups past their deadline and keep what they produced
+                now = time.perf_counter()
+                for slot, started_at in sorted(running.items()):
+                    if now - started_at < deadline:
+                        continue
+                    del running[slot]
+                    cancel[slot].set()
+                    count = len(found.get(slot, []))
+                    finished[slot] = {"status": "timeout", "count": count, "finished_at": now,
+                                      "seconds": now - started_at}
+                    yield {"type": "source_finished", "query": queries[slot[0]], "source": slot[1],
+                           "status": "timeout", "count": count, "seconds": now - started_at,
+                           "progress": len(finished) / total}
+        finally:
+            # Stop any lookup still running, e.g. when the caller stopped reading early
+            for cancelled in cancel.values():
+                cancelled.set()
+
+        # Merge in query order (GitHub first, then the internal database) so results are deterministic
         candidates = []
-        # Search external sources first
-        for query in search_queries:
-            if query.strip():
-                # Search GitHub
-                github_results = self.external_sourcer.search_github(query.strip())
-                if github_results:
-                    candidates.extend(github_results)
-                
-                # Search internal database
-                db_results = self.db.search_candidates(query)
-                if db_results and 'ids' in db_results:
-                    for i in range(len(db_results['ids'])):
-                        candidate = {
-                            'id': str(db_results['ids'][i]),
-                            'metadata': db_results['metadatas'][i],
-                            'source': 'Internal Database'
-                        }
-                        candidates.append(candidate)
+        query_timings = []
+        for index, query in enumerate(queries):
+            github, database = finished[(index, "GitHub")], finished[(index, "Internal Database")]
+            candidates.extend(found.get((index, "GitHub"), []))
+            candidates.extend(found.get((index, "Internal Database"), []))
+            query_timings.append({
+                "query": query,
+                "github_seconds": github["seconds"],
+                "database_seconds": database["seconds"],
+                "seconds": max(github["finished_at"], database["finished_at"]) - fan_out_start,
+                "github_count": github["count"],
+                "database_count": database["count"],
+                "github_status": github["status"],
+                "database_status": database["status"]
+            })
 
         # Remove duplicates
         unique_candidates = {}
         for candidate in candidates:
             candidate_id = str(candidate.get('id', ''))
             if candidate_id and candidate_id not in unique_candidates:
-                # Normalize the data structure
-                if 'metadata' not in candidate:
-                    candidate = self.external_sourcer.normalize_candidate_data(candidate)
                 unique_candidates[candidate_id] = candidate
 
-        # Add any new external candidates to the database
-        for candidate in candidates:
-            if candidate.get('source') != 'Internal Database':
-                candidate_id = str(candidate.get('id', ''))
-                if candidate_id and not self.db.get_candidate(candidate_id).get('ids'):
-                    normalized = self.external_sourcer.normalize_candidate_data(candidate)
-                    self.add_candidate_to_database(
-                        candidate_id,
-                        normalized.get('document', ''),
-                        normalized.get('metadata', {})
-                    )
-
-        return {
+        # Merge records of the same person found under different ids or sources
+        resolved = self.identity_resolver.resolve(list(unique_candidates.values()))
+
+        # Persist new external candidates in the background so results return before the disk writes
+        external = [candidate for candidate in resolved if candidate.get('source') != 'Internal Database']
+        if external:
+            self._pending_writes = [future for future in self._pending_writes if not future.done()]
+            self._pending_writes.append(self._writer.submit(self._persist_new_candidates, external))
+
+        yield {
+            "type": "done",
             "search_queries": search_queries,
-            "candidates": list(unique_candidates.values())
+            "candidates": resolved,
+            "query_timings": query_timings,
+            "progress": 1.0
         }
 
+    def _query_cache_key(self, job_description: str, requirements: str) -> str:
+        payload = json.dumps([job_description, requirements, self.model_name, PROMPT_VERSION])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def generate_search_queries(self, job_description: str, requirements: str) -> List[str]:
+        """Canonical search queries for a job, from the memo or else from the LLM"""
+        cache = self.external_sourcer.cache
+        key = self._query_cache_key(job_description, requirements)
+        cached = cache.get("llm_queries", key)
+        if cached is not None:
+            return cached
+
+        # Get search queries from LLM
+        response = self.chain.invoke({
+            "job_description": job_description,
+            "requirements": requirements
+        })
+        queries = canonicalize_queries(response.content if hasattr(response, 'content') else str(response))
+        if queries:
+            cache.set("llm_queries", key, queries, ttl=self.query_cache_ttl)
+        return queries
+
+    def invalidate_search_queries(self, job_description: Optional[str] = None, requirements: Optional[str] = None):
+        """Forget the memoized queries for one job, or for every job when none is given"""
+        if job_description is None and requirements is None:
+            self.external_sourcer.cache.invalidate("llm_queries")
+        else:
+            self.external_sourcer.cache.invalidate(
+                "llm_queries", self._query_cache_key(job_description or "", requirements or "")
+            )
+
+    @staticmethod
+    def _stream_lookup(events: "queue.Queue[Dict[str, Any]]", cancelled: threading.Event, index: int, query: str,
+                       source: str, iterate: Callable[[str, int, threading.Event], Iterator[Dict[str, Any]]],
+                       max_results: int):
+        """Run one source's lookup for one query, reporting its start, each candidate and its end to `events`.
+
+        Stops early once `cancelled` is set (its deadline passed or the
+        consumer went away); `iterate` gets the event to stop fetching too.
+        """
+        base = {"query_index": index, "query": query, "source": source}
+        finished = {**base, "type": "finished", "status": "ok", "count": 0}
+        start = time.perf_counter()
+        if cancelled.is_set():
+            finished.update(status="timeout", finished_at=start, seconds=0.0)
+            events.put(finished)
+            return
+        events.put({**base, "type": "started", "started_at": start})
+        try:
+            for candidate in iterate(query, max_results, cancelled):
+                finished["count"] += 1
+                events.put({**base, "type": "candidate", "candidate": candidate})
+                if cancelled.is_set():
+                    finished["status"] = "timeout"
+                    break
+        except Exception as e:
+            print(f"Error searching {source} for '{query}': {e}")
+            finished["status"] = "error"
+            finished["error"] = str(e)
+        finally:
+            finished["finished_at"] = time.perf_counter()
+            finished["seconds"] = finished["finished_at"] - start
+            events.put(finished)
+
+    def _iter_github(self, query: str, max_results: int,
+                     cancelled: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        """Enriched GitHub candidates for one query, in normalized form"""
+        for candidate in self.external_sourcer.iter_github(query, max_results, cancelled):
+            yield self.external_sourcer.normalize_candidate_data(candidate)
+
+    def _iter_database(self, query: str, max_results: int,
+                       cancelled: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        """Internal database matches for one query, in candidate dict form; ranked in one pass, so not cancellable"""
+        for record in self.db.iter_candidates(query, max_results=max_results):
+            yield {
+                'id': str(record['id']),
+                'metadata': record['metadata'],
+                'source': 'Internal Database'
+            }
+
+    def _persist_new_candidates(self, candidates: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Add the candidates not yet stored with one membership probe and one batched upsert"""
+        try:
+            existing = self.db.existing_candidate_ids(str(candidate['id']) for candidate in candidates)
+            new_candidates = [
+                (str(candidate['id']), candidate.get('document', ''), candidate.get('metadata', {}))
+                for candidate in candidates if str(candidate['id']) not in existing
+            ]
+            if not new_candidates:
+                return {"inserted": 0, "updated": 0, "skipped": 0}
+            return self.add_candidates_to_database(new_candidates)
+        except Exception as e:
+            print(f"Error saving sourced candidates: {e}")
+            return {"inserted": 0, "updated": 0, "skipped": 0}
+
+    def wait_for_writes(self, timeout: float = None) -> bool:
+        """Block until candidates from earlier searches are saved; False if `timeout` expired first"""
+        _, not_done = wait(self._pending_writes, timeout=timeout)
+        return not not_done
+
     def add_candidate_to_database(self, candidate_id: str, resume_text: str, metadata: Dict[str, Any]):
         """Add a new candidate to the database"""
-        self.db.add_candidate(candidate_id, resume_text, metadata)
\ No newline at end of file
+        self.db.add_candidate(candidate_id, resume_text, metadata)
+
+    def add_candidates_to_database(self, candidates: List[Tuple[str, str, Dict[str, Any]]]) -> Dict[str, int]:
+        """Add many (candidate_id, resume_text, metadata) records to the database at once"""
+        return self.db.add_candidates_batch(candidates)
\ No newline at end of file
@@ -10,7 +10,6 @@ import PyPDF2
 import io
 import pandas as pd
 import base64
-import time
 from datetime import datetime, timedelta
 import json
 
@@ -406,22 +405,39 @@ def main():
         # Execute search
         if search_button:
             with st.spinner("🔍 Searching for candidates..."):
-                # Progress bar animation
                 progress_bar = st.progress(0)
-                for i in range(100):
-                    time.sleep(0.01)
-                    progress_bar.progress(i + 1)
+                status_text = st.empty()
+                live_results = st.empty()
                 
                 # Use custom query if provided, otherwise use job details
                 if search_query:
                     st.session_state.search_query = search_query
-                    results = agents["sourcing"].source_candidates(search_query, search_query)
+                    events = agents["sourcing"].iter_source_candidates(search_query, search_query, max_results)
                 else:
-                    results = agents["sourcing"].source_candidates(
+                    events = agents["sourcing"].iter_source_candidates(
                         st.session_state.current_job["description"],
-                        st.session_state.current_job["requirements"]
+                        st.session_state.current_job["requirements"],
+                        max_results
                     )
                 
+                # Show candidates and real progress as each query and source reports back
+                results = {"candidates": []}
+                found_lines = []
+                for event in events:
+                    progress_bar.progress(int(event["progress"] * 100))
+                    if event["type"] == "query_started":
+                        status_text.caption(f"Searching: {event['query']}")
+                    elif event["type"] == "source_finished":
+                        outcome = "timed out" if event["status"] == "timeout" else "finished"
+                        status_text.caption(f"{event['source']} {outcome} \"{event['query']}\" ({event['count']} found)")
+                    elif event["type"] == "candidate" and event["source"] in search_sources:
+                        metadata = event["candidate"].get("metadata", {})
+                        found_lines.append(f"- **{metadata.get('name') or event['candidate'].get('id')}** "
+                                           f"({event['source']}) {metadata.get('location') or ''}")
+                        live_results.markdown("\n".join(found_lines))
+                    elif event["type"] == "done":
+                        results = event
+                
                 candidates = results["candidates"]
                 # Filter by selected sources
                 candidates = [c for c in candidates if c.get('source', '') in search_sources]
@@ -429,8 +445,10 @@ def main():
                 st.session_state.sourced_candidates = candidates
                 st.session_state.analytics["candidates_sourced"] += len(candidates)
                 
-                # Clear progress bar
+                # Clear progress bar and the live list; the full views below take over
                 progress_bar.empty()
+                status_text.empty()
+                live_results.empty()
                 
                 # Show a success message
                 if candidates:
@@ -0,0 +1,76 @@
+"""Recall@k and latency of IVF approximate search against exact search.
+
+Builds an EmbeddingIndex over a synthetic topic-structured corpus (or an
+existing candidates.json) and compares ANN results for several n_probe values
+with exact brute force on the same queries.
+
+Usage (from the repository root):
+    python -m benchmarks.ann_recall --docs 200000 --k 10
+    python -m benchmarks.ann_recall --candidates data/simple_db/candidates.json
+"""
+from typing import List, Tuple
+import argparse
+import json
+import time
+import numpy as np
+from utils.embeddings import EmbeddingIndex
+
+
+def synthetic_corpus(n_docs: int, n_topics: int = 200, seed: int = 0) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """Documents drawn mostly from one topic's vocabulary plus shared noise words"""
+    rng = np.random.default_rng(seed)
+    topics = [[f"t{topic}w{word}" for word in range(40)] for topic in range(n_topics)]
+    noise = [f"common{word}" for word in range(500)]
+    docs = []
+    for i in range(n_docs):
+        topic = topics[rng.integers(n_topics)]
+        words = list(rng.choice(topic, 12)) + list(rng.choice(noise, 6))
+        docs.append((f"doc{i}", " ".join(words)))
+    queries = [" ".join(rng.choice(topics[rng.integers(n_topics)], 4)) for _ in range(200)]
+    return docs, queries
+
+
+def candidates_corpus(path: str) -> Tuple[List[Tuple[str, str]], List[str]]:
+    with open(path, 'r') as f:
+        candidates = json.load(f)
+    docs = [(candidate_id, record["document"]) for candidate_id, record in candidates.items()]
+    queries = [" ".join(record["metadata"].get("skills", [])[:3]) or record["document"][:60]
+               for record in candidates.values()][:200]
+    return docs, queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100000, help="synthetic corpus size")
+    parser.add_argument("--candidates", help="benchmark on a candidates.json instead of synthetic data")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--probes", default="1,2,4,8,16,32")
+    args = parser.parse_args()
+
+    docs, queries = candidates_corpus(args.candidates) if args.candidates else synthetic_corpus(args.docs)
+    index = EmbeddingIndex(ann_threshold=None)
+
+    start = time.perf_counter()
+    index.add_many(docs)
+    print(f"encoded {len(index)} docs in {time.perf_counter() - start:.1f}s")
+    start = time.perf_counter()
+    index.build_ann()
+    print(f"trained IVF with {index.ann.n_lists} cells in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    exact = [{doc_id for doc_id, _ in index.search(query, args.k, exact=True)} for query in queries]
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    print(f"{'mode':>12} {'recall@' + str(args.k):>10} {'ms/query':>10}")
+    print(f"{'exact':>12} {1.0:>10.3f} {exact_ms:>10.2f}")
+
+    for n_probe in (int(p) for p in args.probes.split(",")):
+        index.ann.n_probe = n_probe
+        start = time.perf_counter()
+        approx = [{doc_id for doc_id, _ in index.search(query, args.k, exact=False)} for query in queries]
+        ann_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        recalls = [len(a & e) / len(e) for a, e in zip(approx, exact) if e]
+        print(f"{'n_probe=' + str(n_probe):>12} {np.mean(recalls):>10.3f} {ann_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
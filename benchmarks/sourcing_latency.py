@@ -0,0 +1,152 @@
+"""End-to-end sourcing latency and request counts against a simulated GitHub/LinkedIn.
+
+Runs ExternalSourcer.search_all_sources over a fixed set of recruiter queries
+under several simulated network conditions, first with an empty cache and then
+again warm, and reports wall time, per-query latency, upstream requests by
+route and time spent throttled by the rate limiter.
+
+With --agent the same queries go through SourcingAgent.iter_source_candidates
+instead, as one job fanned out to every query (its generated queries are
+seeded in the memo, so no LLM is called) against a scratch internal database.
+That covers the concurrent GitHub/database lookups and their deadlines, and
+the timeout column counts lookups cut off by SOURCING_DEADLINE_SECONDS.
+
+Usage (from the repository root):
+    python -m benchmarks.sourcing_latency
+    python -m benchmarks.sourcing_latency --server --scenarios slow,rate-limited
+    python -m benchmarks.sourcing_latency --enrichment rest,graphql
+    python -m benchmarks.sourcing_latency --agent --scenarios slow --max-results 30
+"""
+from typing import Dict, Any, List
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from benchmarks.sourcing_replay import FakeSourcingBackend, FakeSourcingServer, ReplayTransport
+from utils.database import VectorDatabase
+from utils.external_sourcing import ExternalSourcer
+from utils.http_client import HttpClient
+
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    "lan": {"latency": 0.002},
+    "broadband": {"latency": 0.03, "jitter": 0.02},
+    "slow": {"latency": 0.15, "jitter": 0.1},
+    "rate-limited": {"latency": 0.02, "rate_limits": {"search": 5, "core": 120, "linkedin": 20}, "window": 5.0},
+}
+
+QUERIES = [
+    "python machine learning",
+    "go kubernetes",
+    "typescript react",
+    "rust systems",
+    "java kotlin android",
+    "python django",
+    "aws kubernetes go",
+    "machine learning pytorch",
+]
+
+
+def run_queries(sourcer: ExternalSourcer, queries: List[str]) -> Dict[str, Any]:
+    latencies = []
+    found = 0
+    start = time.perf_counter()
+    for query in queries:
+        query_start = time.perf_counter()
+        found += len(sourcer.search_all_sources(query))
+        latencies.append(time.perf_counter() - query_start)
+    return {"wall": time.perf_counter() - start, "p50": float(np.percentile(latencies, 50)),
+            "max": max(latencies), "candidates": found, "timeouts": 0}
+
+
+def seed_database(db: VectorDatabase, backend: FakeSourcingBackend, n_candidates: int) -> None:
+    """Store some of the simulated developers as internal candidates, as earlier sourcing would have"""
+    db.add_candidates_batch([
+        (f"db_{user['id']}", f"{user['name']} {user['bio']} {' '.join(user['skills'])}",
+         {"name": user["name"], "location": user["location"], "company": user["company"],
+          "skills": user["skills"], "bio": user["bio"], "source": "Internal Database"})
+        for user in backend.users[:n_candidates]
+    ])
+
+
+def run_agent_queries(agent, queries: List[str], max_results: int) -> Dict[str, Any]:
+    """One job whose generated queries are `queries`, streamed through SourcingAgent.iter_source_candidates"""
+    job_description, requirements = "benchmark job", "benchmark requirements"
+    agent.external_sourcer.cache.set("llm_queries", agent._query_cache_key(job_description, requirements), queries)
+    start = time.perf_counter()
+    for event in agent.iter_source_candidates(job_description, requirements, max_results):
+        if event["type"] == "done":
+            timings = event["query_timings"]
+            latencies = [timing["seconds"] for timing in timings]
+            timeouts = sum((timing["github_status"] == "timeout") + (timing["database_status"] == "timeout")
+                           for timing in timings)
+            stats = {"wall": time.perf_counter() - start, "p50": float(np.percentile(latencies, 50)),
+                     "max": max(latencies), "candidates": len(event["candidates"]), "timeouts": timeouts}
+    agent.wait_for_writes()
+    return stats
+
+
+def run_scenario(name: str, use_server: bool, n_users: int, enrichment: str, use_agent: bool = False,
+                 max_results: int = 10) -> None:
+    backend = FakeSourcingBackend(n_users=n_users, **SCENARIOS[name])
+    server = FakeSourcingServer(backend).start() if use_server else None
+    base_url = server.url if server else backend.base_url
+    os.environ.update({
+        "GITHUB_TOKEN": "benchmark", "LINKEDIN_API_KEY": "benchmark", "LINKEDIN_CLIENT_SECRET": "benchmark",
+        "GITHUB_API_URL": base_url, "GITHUB_GRAPHQL_URL": f"{base_url}/graphql",
+        "LINKEDIN_API_URL": server.url if server else backend.linkedin_url, "GITHUB_ENRICHMENT": enrichment,
+    })
+    http_client = HttpClient() if server else HttpClient(transport=ReplayTransport(backend))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        sourcer = ExternalSourcer(http_client=http_client, cache_dir=os.path.join(cache_dir, "sourcing_cache"))
+        agent = None
+        if use_agent:
+            # Imported here so the sourcer-only benchmark does not need the LLM client libraries
+            from agents.sourcing_agent import SourcingAgent
+            os.environ.setdefault("GROQ_API_KEY", "benchmark")  # The LLM is never called
+            db = VectorDatabase(data_dir=os.path.join(cache_dir, "db"))
+            seed_database(db, backend, n_users // 5)
+            agent = SourcingAgent(db=db, external_sourcer=sourcer)
+        for phase in ("cold", "warm"):
+            backend.counts.clear()
+            throttled_before = sum(m["throttled_seconds"] for m in sourcer.rate_limiter.metrics().values())
+            if agent:
+                stats = run_agent_queries(agent, QUERIES, max_results)
+            else:
+                stats = run_queries(sourcer, QUERIES)
+            throttled = sum(m["throttled_seconds"] for m in sourcer.rate_limiter.metrics().values()) - throttled_before
+            requests_made = sum(count for route, count in backend.counts.items() if not route.endswith("_304"))
+            routes = " ".join(f"{route}={count}" for route, count in sorted(backend.counts.items()))
+            print(f"{name:>13} {enrichment:>7} {phase:>5} {stats['wall']:>8.2f} {stats['p50'] * 1000:>9.0f} "
+                  f"{stats['max'] * 1000:>9.0f} {requests_made:>9} {throttled:>10.2f} {stats['candidates']:>6} "
+                  f"{stats['timeouts']:>8}  {routes}")
+        if agent:
+            agent.db.close()
+        sourcer.cache.close()
+    if server:
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--users", type=int, default=500, help="synthetic GitHub/LinkedIn population")
+    parser.add_argument("--enrichment", default="rest", help="comma-separated GitHub enrichment modes "
+                                                              "to compare (rest, graphql)")
+    parser.add_argument("--server", action="store_true", help="go through a local HTTP server instead of "
+                                                              "an in-process transport")
+    parser.add_argument("--agent", action="store_true", help="run the queries as one job through "
+                                                             "SourcingAgent.iter_source_candidates")
+    parser.add_argument("--max-results", type=int, default=10, help="results per source and query (--agent)")
+    args = parser.parse_args()
+
+    print(f"{'scenario':>13} {'enrich':>7} {'phase':>5} {'wall s':>8} {'p50 ms':>9} {'max ms':>9} {'requests':>9} "
+          f"{'throttled':>10} {'found':>6} {'timeouts':>8}  routes")
+    for name in args.scenarios.split(","):
+        for enrichment in args.enrichment.split(","):
+            run_scenario(name, args.server, args.users, enrichment, args.agent, args.max_results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""Offline stand-ins for the GitHub and LinkedIn APIs used by ExternalSourcer.
+
+FakeSourcingBackend synthesizes deterministic responses for /search/users,
+/users/<login>, /users/<login>/repos, /repos/<login>/<repo>/languages, the
+aliased `user(login: ...)` lookups ExternalSourcer sends to /graphql, and
+LinkedIn's /v2/talentSearch, with configurable latency, rate-limit headers
+(X-RateLimit-*, 403 once a budget is spent) and ETag/304 handling. It can be
+reached in-process through ReplayTransport (an HttpClient transport) or over
+real sockets through FakeSourcingServer (point GITHUB_API_URL and
+LINKEDIN_API_URL at its url). RecordingTransport captures live traffic into a
+cassette that ReplayTransport can serve back.
+"""
+from typing import Dict, Any, Optional, Tuple, List
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+SKILLS = ["Python", "Java", "Go", "Rust", "TypeScript", "JavaScript", "C++", "Kotlin", "Swift", "Ruby",
+          "Scala", "SQL", "Machine Learning", "React", "Django", "Kubernetes", "AWS", "PyTorch"]
+LOCATIONS = ["Bengaluru, India", "Mumbai, India", "Berlin, Germany", "London, UK", "Austin, TX", "Remote"]
+COMPANIES = ["Acme Corp", "Initech", "Globex", "Umbrella", "Hooli", "Stark Industries", ""]
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+GRAPHQL_USER_PATTERN = re.compile(r'(\w+)\s*:\s*user\(login:\s*("(?:[^"\\]|\\.)*")\)')
+
+
+class FakeSourcingBackend:
+    """Synthetic GitHub/LinkedIn API with simulated latency and rate limits.
+
+    `rate_limits` maps an endpoint class ("search", "core", "linkedin") to
+    the number of requests allowed per `window` seconds; classes without an
+    entry are unlimited and send no rate-limit headers. Every handled
+    request is counted per route in `counts`.
+    """
+
+    def __init__(self, n_users: int = 500, repos_per_user: int = 6, seed: int = 0,
+                 base_url: str = "https://api.github.com", linkedin_url: str = "https://api.linkedin.com",
+                 latency: float = 0.0, jitter: float = 0.0, rate_limits: Optional[Dict[str, int]] = None,
+                 window: float = 60.0):
+        self.base_url = base_url.rstrip("/")
+        self.linkedin_url = linkedin_url.rstrip("/")
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limits = dict(rate_limits or {})
+        self.window = window
+        self.counts: Counter = Counter()
+        self._budgets: Dict[str, List[float]] = {}  # class -> [remaining, reset epoch]
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+        rng = random.Random(seed)
+        self.users = []
+        for i in range(n_users):
+            skills = rng.sample(SKILLS, 4)
+            self.users.append({
+                "id": 1000 + i,
+                "login": f"dev{i}",
+                "name": f"Developer {i}",
+                "location": rng.choice(LOCATIONS),
+                "company": rng.choice(COMPANIES),
+                "bio": f"Engineer working with {', '.join(skills)}",
+                "skills": skills,
+                "public_repos": rng.randint(1, 120),
+                "repos": [{"id": (1000 + i) * 100 + r, "name": f"project-{i}-{r}", "language": rng.choice(skills),
+                           "languages": {skill: rng.randint(1000, 90000) for skill in rng.sample(skills, 2)}}
+                          for r in range(repos_per_user)],
+            })
+        self.by_login = {user["login"]: user for user in self.users}
+
+    # Endpoint payloads
+
+    def _user_item(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        return {"login": user["login"], "id": user["id"], "type": "User", "score": 1.0,
+                "url": f"{self.base_url}/users/{user['login']}",
+                "repos_url": f"{self.base_url}/users/{user['login']}/repos",
+                "html_url": f"https://github.com/{user['login']}"}
+
+    def _matches(self, query: str) -> List[Dict[str, Any]]:
+        # Qualifiers like language:python count as plain terms; every fake account is a user
+        terms = {part.split(":")[-1].strip('"').lower() for part in query.split()
+                 if part.strip('"') and not part.startswith("type:")}
+        scored = []
+        for user in self.users:
+            text = (user["bio"] + " " + user["location"]).lower()
+            hits = sum(1 for term in terms if term and term in text)
+            if hits:
+                scored.append((-hits, -user["public_repos"], user["id"], user))
+        scored.sort(key=lambda item: item[:3])
+        return [user for *_, user in scored]
+
+    def search_users(self, params: Dict[str, str]) -> Dict[str, Any]:
+        per_page = min(int(params.get("per_page", 30)), 100)
+        page = max(int(params.get("page", 1)), 1)
+        matches = self._matches(params.get("q", ""))
+        items = matches[(page - 1) * per_page:page * per_page]
+        return {"total_count": len(matches), "incomplete_results": False,
+                "items": [self._user_item(user) for user in items]}
+
+    def user(self, login: str) -> Dict[str, Any]:
+        user = self.by_login[login]
+        return {**self._user_item(user), "name": user["name"], "location": user["location"],
+                "company": user["company"], "bio": user["bio"], "public_repos": user["public_repos"],
+                "followers": user["public_repos"] * 3, "created_at": "2015-01-01T00:00:00Z"}
+
+    def repos(self, login: str) -> List[Dict[str, Any]]:
+        return [{"id": repo["id"], "name": repo["name"], "full_name": f"{login}/{repo['name']}",
+                 "language": repo["language"], "stargazers_count": repo["id"] % 500,
+                 "description": f"{repo['name']} written in {repo['language']}",
+                 "languages_url": f"{self.base_url}/repos/{login}/{repo['name']}/languages"}
+                for repo in self.by_login[login]["repos"]]
+
+    def languages(self, login: str, repo_name: str) -> Dict[str, int]:
+        return next(repo["languages"] for repo in self.by_login[login]["repos"] if repo["name"] == repo_name)
+
+    def talent_search(self, params: Dict[str, str]) -> Dict[str, Any]:
+        start, count = int(params.get("start", 0)), int(params.get("count", 10))
+        matches = self._matches(params.get("keywords", ""))[start:start + count]
+        return {"elements": [{
+            "id": f"{user['id']}",
+            "firstName": "Developer",
+            "lastName": str(user["id"]),
+            "headline": f"{user['skills'][0]} Engineer",
+            "location": {"name": user["location"]},
+            "positions": {"elements": [{"companyName": user["company"], "startDate": {"year": 2018, "month": 1}}]},
+            "skills": {"elements": [{"name": skill} for skill in user["skills"]]},
+            "education": {"elements": [{"degreeName": "B.Tech", "schoolName": "State University",
+                                        "endDate": {"year": 2017}}]},
+        } for user in matches], "paging": {"start": start, "count": count}}
+
+    def graphql(self, body: Optional[bytes]) -> Dict[str, Any]:
+        """Answer each aliased user(login: ...) field with a profile, top repos and their languages"""
+        query = json.loads(body or b"{}").get("query", "")
+        data = {}
+        for alias, login in GRAPHQL_USER_PATTERN.findall(query):
+            user = self.by_login.get(json.loads(login))
+            data[alias] = None if user is None else {
+                "databaseId": user["id"], "login": user["login"], "name": user["name"],
+                "location": user["location"], "company": user["company"], "bio": user["bio"],
+                "url": f"https://github.com/{user['login']}",
+                "repositories": {
+                    "totalCount": user["public_repos"],
+                    "nodes": [{"name": repo["name"], "primaryLanguage": {"name": repo["language"]},
+                               "languages": {"nodes": [{"name": name} for name in repo["languages"]]}}
+                              for repo in sorted(user["repos"], key=lambda repo: repo["name"])[:5]],
+                },
+            }
+        return {"data": data}
+
+    # Request handling
+
+    def _route(self, method: str, url: str, body: Optional[bytes] = None) -> Tuple[str, str, Any]:
+        """(endpoint class, route name, handler result) for a request URL"""
+        parts = urlsplit(url)
+        params = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        if url.startswith(self.linkedin_url) and parts.path.endswith("/v2/talentSearch"):
+            return "linkedin", "talentSearch", self.talent_search(params)
+        if not url.startswith(self.base_url):
+            raise KeyError(url)
+        path = url[len(self.base_url):].split("?")[0].strip("/").split("/")
+        if method == "POST" and path == ["graphql"]:
+            return "graphql", "graphql", self.graphql(body)
+        if path == ["search", "users"]:
+            return "search", "search", self.search_users(params)
+        if len(path) == 2 and path[0] == "users":
+            return "core", "user", self.user(path[1])
+        if len(path) == 3 and path[0] == "users" and path[2] == "repos":
+            return "core", "repos", self.repos(path[1])
+        if len(path) == 4 and path[0] == "repos" and path[3] == "languages":
+            return "core", "languages", self.languages(path[1], path[2])
+        raise KeyError(url)
+
+    def _rate_limit(self, endpoint_class: str) -> Tuple[bool, Dict[str, str]]:
+        """Spend one request from the class budget; (allowed, rate-limit headers)"""
+        limit = self.rate_limits.get(endpoint_class)
+        if limit is None:
+            return True, {}
+        with self._lock:
+            now = time.time()
+            budget = self._budgets.get(endpoint_class)
+            if budget is None or now >= budget[1]:
+                budget = self._budgets[endpoint_class] = [limit, now + self.window]
+            allowed = budget[0] > 0
+            if allowed:
+                budget[0] -= 1
+            return allowed, {"X-RateLimit-Limit": str(limit), "X-RateLimit-Remaining": str(int(budget[0])),
+                             "X-RateLimit-Reset": str(int(budget[1]) + 1)}
+
+    def handle(self, method: str, url: str, headers: Dict[str, str], body: Optional[bytes] = None) -> Response:
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+        try:
+            endpoint_class, route, payload = self._route(method, url, body)
+        except (KeyError, StopIteration, ValueError):
+            self.counts["not_found"] += 1
+            return 404, {"Content-Type": "application/json"}, b'{"message": "Not Found"}'
+
+        body = json.dumps(payload).encode()
+        etag = '"' + hashlib.md5(body).hexdigest()[:16] + '"'
+        if headers.get("If-None-Match") == etag:
+            # Like GitHub, a 304 does not count against the rate limit
+            self.counts[route + "_304"] += 1
+            return 304, {"ETag": etag}, b""
+
+        allowed, limit_headers = self._rate_limit(endpoint_class)
+        if not allowed:
+            self.counts["rate_limited"] += 1
+            return 403, {**limit_headers, "Content-Type": "application/json"}, \
+                b'{"message": "API rate limit exceeded"}'
+        self.counts[route] += 1
+        return 200, {**limit_headers, "Content-Type": "application/json", "ETag": etag}, body
+
+
+def _build_response(request: requests.PreparedRequest, status: int, headers: Dict[str, str],
+                    body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = body
+    response.encoding = "utf-8"
+    response.url = request.url
+    response.request = request
+    response.reason = {200: "OK", 304: "Not Modified", 403: "Forbidden", 404: "Not Found"}.get(status, "")
+    return response
+
+
+def _cassette_key(request: requests.PreparedRequest) -> str:
+    return f"{request.method} {request.url}"
+
+
+class ReplayTransport(BaseAdapter):
+    """requests adapter serving a recorded cassette, falling back to a FakeSourcingBackend"""
+
+    def __init__(self, backend: Optional[FakeSourcingBackend] = None, cassette_path: Optional[str] = None):
+        super().__init__()
+        self.backend = backend
+        self.cassette: Dict[str, Dict[str, Any]] = {}
+        if cassette_path:
+            with open(cassette_path, 'r') as f:
+                self.cassette = json.load(f)
+
+    def send(self, request, **kwargs):
+        recorded = self.cassette.get(_cassette_key(request))
+        if recorded is not None:
+            return _build_response(request, recorded["status"], recorded["headers"], recorded["body"].encode())
+        if self.backend is None:
+            return _build_response(request, 404, {}, b'{"message": "Not recorded"}')
+        body = request.body.encode() if isinstance(request.body, str) else request.body
+        status, headers, body = self.backend.handle(request.method, request.url, dict(request.headers), body)
+        return _build_response(request, status, headers, body)
+
+    def close(self):
+        pass
+
+
+class RecordingTransport(BaseAdapter):
+    """requests adapter that forwards to a real one and records every exchange"""
+
+    def __init__(self, inner: Optional[BaseAdapter] = None):
+        super().__init__()
+        self.inner = inner or HTTPAdapter()
+        self.cassette: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        response = self.inner.send(request, **kwargs)
+        with self._lock:
+            self.cassette[_cassette_key(request)] = {
+                "status": response.status_code,
+                "headers": {key: value for key, value in response.headers.items()
+                            if key.lower() not in ("content-encoding", "content-length", "transfer-encoding")},
+                "body": response.text,
+            }
+        return response
+
+    def save(self, path: str):
+        with self._lock:
+            with open(path + ".tmp", 'w') as f:
+                json.dump(self.cassette, f)
+        os.replace(path + ".tmp", path)
+
+    def close(self):
+        self.inner.close()
+
+
+class FakeSourcingServer:
+    """Serves a FakeSourcingBackend over HTTP on localhost, in a background thread"""
+
+    def __init__(self, backend: FakeSourcingBackend, port: int = 0):
+        self.backend = backend
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so client connection pooling is exercised
+
+            def do_GET(self):
+                self._respond(*server.backend.handle("GET", server.url + self.path, dict(self.headers)))
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self._respond(*server.backend.handle("POST", server.url + self.path, dict(self.headers), body))
+
+            def _respond(self, status: int, headers: Dict[str, str], body: bytes):
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        backend.base_url = backend.linkedin_url = self.url
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self) -> "FakeSourcingServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
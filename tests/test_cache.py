@@ -0,0 +1,114 @@
+import time
+
+import pytest
+
+from utils.cache import SourcingCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SourcingCache(str(tmp_path / "cache.db"), ttls={"short": 60.0})
+    yield cache
+    cache.close()
+
+
+def test_entries_expire_after_their_namespace_ttl(cache):
+    now = time.time()
+    cache.set("short", "a", {"v": 1}, created_at=now - 61)
+    cache.set("other", "a", {"v": 2}, created_at=now - 61)
+
+    assert cache.get("short", "a") is None
+    assert cache.get("other", "a") == {"v": 2}
+    assert cache.stats()["expired"] == 1
+
+
+def test_explicit_ttl_overrides_the_namespace(cache):
+    cache.set("short", "a", [1], ttl=0.0)
+    cache.set("short", "b", [2], ttl=3600.0, created_at=time.time() - 120)
+
+    assert cache.get("short", "a") is None
+    assert cache.get("short", "b") == [2]
+
+
+def test_values_are_copies(cache):
+    cache.set("ns", "a", {"skills": ["go"]})
+    cache.get("ns", "a")["skills"].append("rust")
+
+    assert cache.get("ns", "a") == {"skills": ["go"]}
+
+
+def test_prune_evicts_least_recently_used_rows(tmp_path):
+    cache = SourcingCache(str(tmp_path / "cache.db"), max_entries=2, memory_entries=0, prune_every=1000)
+    cache.set("ns", "a", 1)
+    time.sleep(0.01)
+    cache.set("ns", "b", 2)
+    time.sleep(0.01)
+    assert cache.get("ns", "a") == 1  # Now more recently used than b
+    time.sleep(0.01)
+    cache.set("ns", "c", 3)
+
+    cache.prune()
+
+    assert len(cache) == 2
+    assert cache.get("ns", "b") is None
+    assert cache.get("ns", "a") == 1 and cache.get("ns", "c") == 3
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+
+
+def test_prune_drops_rows_expired_past_the_grace_period(tmp_path):
+    cache = SourcingCache(str(tmp_path / "cache.db"), stale_grace=60.0)
+    cache.set("ns", "stale", 1, ttl=0.0, created_at=time.time() - 30)
+    cache.set("ns", "dead", 2, ttl=0.0, created_at=time.time() - 120)
+
+    cache.prune()
+
+    assert cache.get_entry("ns", "stale")["expired"]
+    assert cache.get_entry("ns", "dead") is None
+    cache.close()
+
+
+def test_instances_share_the_table(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first, second = SourcingCache(path), SourcingCache(path)
+    first.set("ns", "a", "hello")
+
+    assert second.get("ns", "a") == "hello"
+    first.invalidate("ns")
+    assert first.get("ns", "a") is None
+    first.close()
+    second.close()
+
+
+def test_touch_restarts_an_expired_entry(cache):
+    cache.set("short", "a", {"v": 1}, ttl=0.0, etag='"abc"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    entry = cache.get_entry("short", "a")
+    assert entry == {"value": {"v": 1}, "expired": True, "etag": '"abc"',
+                     "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+
+    assert cache.touch("short", "a")
+    assert cache.get("short", "a") == {"v": 1}
+    assert cache.stats()["revalidated"] == 1
+    assert not cache.touch("short", "missing")
+
+
+def test_expired_github_entry_is_revalidated_with_a_304(tmp_path, monkeypatch):
+    from benchmarks.sourcing_replay import FakeSourcingBackend, ReplayTransport
+    from utils.external_sourcing import ExternalSourcer
+    from utils.http_client import HttpClient
+
+    backend = FakeSourcingBackend(n_users=5)
+    monkeypatch.setenv("GITHUB_TOKEN", "test")
+    monkeypatch.setenv("GITHUB_API_URL", backend.base_url)
+    sourcer = ExternalSourcer(http_client=HttpClient(transport=ReplayTransport(backend)),
+                              cache_dir=str(tmp_path / "sourcing_cache"))
+    url = f"{backend.base_url}/users/dev0"
+
+    profile = sourcer._github_cached("github_user", 1000, url)
+    assert sourcer.cache.touch("github_user", "1000", ttl=-1.0)  # Expire it, keeping the ETag
+    assert sourcer._github_cached("github_user", 1000, url) == profile
+
+    assert backend.counts["user"] == 1
+    assert backend.counts["user_304"] == 1
+    assert sourcer.cache.get("github_user", "1000") == profile
+    sourcer.cache.close()
@@ -0,0 +1,38 @@
+import pytest
+
+from utils.database import VectorDatabase, STORAGE_BACKENDS
+
+
+@pytest.fixture(params=STORAGE_BACKENDS)
+def db(request, tmp_path):
+    database = VectorDatabase(data_dir=str(tmp_path), storage=request.param, flush_interval=60.0)
+    yield database
+    database.close()
+
+
+def test_batch_counts_inserts_updates_and_skips(db):
+    counts = db.add_candidates_batch([
+        ("c1", "Python developer", {"name": "Ana"}),
+        ("c2", "Go developer", {"name": "Ben"}),
+        ("", "No id", {}),
+        ("c2", "Go and Rust developer", {"name": "Ben"}),
+    ])
+    assert counts == {"inserted": 2, "updated": 0, "skipped": 2}
+    assert db.candidates.get("c2")["document"] == "Go and Rust developer"
+
+    counts = db.add_candidates_batch([
+        ("c1", "Python developer", {"name": "Ana"}),
+        ("c2", "Go developer", {"name": "Ben"}),
+        ("c3", "Java developer", {"name": "Cy"}),
+    ])
+    assert counts == {"inserted": 1, "updated": 1, "skipped": 1}
+    assert len(db.candidates) == 3
+
+
+def test_batch_updates_search_index(db):
+    db.add_candidates_batch([("c1", "Python developer", {"name": "Ana"})])
+    db.search_candidates("developer")  # Build the index before the next batch
+    db.add_candidates_batch([("c2", "Kubernetes operator engineer", {"name": "Ben"})])
+
+    results = db.search_candidates("kubernetes operator", n_results=1)
+    assert results["ids"] == ["c2"]
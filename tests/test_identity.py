@@ -0,0 +1,98 @@
+from utils.identity import IdentityResolver, blocking_keys
+from utils.external_sourcing import candidate_document
+
+
+def make_candidate(candidate_id, source, name, location="", profile_url="", company="", skills=None, bio=""):
+    metadata = {
+        "name": name,
+        "location": location,
+        "title": "",
+        "company": company,
+        "skills": skills or [],
+        "experience": "",
+        "education": "",
+        "bio": bio,
+        "profile_url": profile_url,
+    }
+    return {"id": candidate_id, "source": source, "metadata": metadata, "document": candidate_document(metadata)}
+
+
+def test_different_accounts_on_same_host_are_not_merged():
+    stored = make_candidate("gh_1", "Internal Database", "Rahul Sharma", "Delhi", "https://github.com/rahul1",
+                            company="Acme", skills=["Python"])
+    live = make_candidate("gh_2", "GitHub", "Rahul Sharma", "Delhi", "https://github.com/rsharma",
+                          company="Acme", skills=["Python"])
+
+    assert len(IdentityResolver().resolve([stored, live])) == 2
+
+
+def test_same_id_namespace_is_not_merged():
+    first = make_candidate("gh_1", "GitHub", "Rahul Sharma", "Delhi", company="Acme")
+    second = make_candidate("gh_2", "GitHub", "Rahul Sharma", "Delhi", company="Acme")
+
+    assert len(IdentityResolver().resolve([first, second])) == 2
+
+
+def test_same_name_and_city_without_evidence_is_not_merged():
+    first = make_candidate("li_1", "LinkedIn", "Rahul Sharma", "Delhi", company="Acme", skills=["Java"])
+    second = make_candidate("gh_1", "GitHub", "Rahul Sharma", "Delhi", company="Globex", skills=["Go"])
+
+    assert len(IdentityResolver().resolve([first, second])) == 2
+
+
+def test_no_fuzzy_merge_without_location():
+    first = make_candidate("li_1", "LinkedIn", "Rahul Sharma", company="Acme", skills=["Python"])
+    second = make_candidate("gh_1", "GitHub", "Rahul Sharma", "Remote", company="Acme", skills=["Python"])
+
+    assert blocking_keys(first)[1] == []
+    assert len(IdentityResolver().resolve([first, second])) == 2
+
+
+def test_cross_source_records_with_evidence_are_merged():
+    linkedin = make_candidate("li_1", "LinkedIn", "Rahul Sharma", "New Delhi, India",
+                              "https://linkedin.com/in/rahul-sharma", company="Acme Corp", skills=["Python", "Django"])
+    github = make_candidate("gh_1", "GitHub", "Rahul K. Sharma", "new delhi", "https://github.com/rsharma",
+                            company="acme corp", skills=["Python", "Go"], bio="Backend engineer")
+
+    merged = IdentityResolver().resolve([github, linkedin])
+
+    assert len(merged) == 1
+    candidate = merged[0]
+    assert candidate["id"] == "li_1"
+    assert candidate["metadata"]["merged_ids"] == ["gh_1", "li_1"]
+    assert candidate["metadata"]["skills"] == ["Python", "Django", "Go"]
+    assert {entry["source"] for entry in candidate["provenance"]} == {"LinkedIn", "GitHub"}
+
+
+def test_same_profile_url_is_merged_and_document_regenerated():
+    stored = make_candidate("gh_1", "Internal Database", "Rahul Sharma", profile_url="https://github.com/rsharma")
+    live = make_candidate("gh_1", "GitHub", "rsharma", "Delhi", "http://www.github.com/rsharma/",
+                          skills=["Rust"], bio="Systems programmer")
+
+    merged = IdentityResolver().resolve([stored, live])
+
+    assert len(merged) == 1
+    candidate = merged[0]
+    assert candidate["source"] == "Internal Database"
+    assert candidate["metadata"]["location"] == "Delhi"
+    assert candidate["document"] == candidate_document(candidate["metadata"])
+    assert "Skills: Rust" in candidate["document"]
+    assert "Bio: Systems programmer" in candidate["document"]
+
+
+def test_merge_does_not_chain_across_conflicting_accounts():
+    first = make_candidate("gh_1", "GitHub", "Rahul Sharma", "Delhi", "https://github.com/rahul1", company="Acme")
+    bridge = make_candidate("li_1", "LinkedIn", "Rahul Sharma", "Delhi", company="Acme")
+    second = make_candidate("gh_2", "GitHub", "Rahul Sharma", "Delhi", "https://github.com/rsharma", company="Acme")
+
+    merged = IdentityResolver().resolve([first, bridge, second])
+
+    assert len(merged) == 2
+    assert sorted(len(candidate["provenance"]) if "provenance" in candidate else 1 for candidate in merged) == [1, 2]
+
+
+def test_shared_profile_url_does_not_merge_ids_in_one_namespace():
+    first = make_candidate("gh_1", "GitHub", "Rahul Sharma", "Delhi", "https://github.com/rsharma")
+    second = make_candidate("gh_2", "Internal Database", "Rahul Sharma", "Delhi", "https://github.com/rsharma")
+
+    assert len(IdentityResolver().resolve([first, second])) == 2
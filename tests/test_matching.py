@@ -0,0 +1,42 @@
+import numpy as np
+
+from utils.matching import match_top_k
+
+
+def blocks_of(vectors, size):
+    for start in range(0, len(vectors), size):
+        yield np.arange(start, min(start + size, len(vectors))), vectors[start:start + size]
+
+
+def test_match_top_k_agrees_with_brute_force():
+    rng = np.random.default_rng(0)
+    queries = rng.normal(size=(37, 16)).astype(np.float32)
+    targets = rng.normal(size=(101, 16)).astype(np.float32)
+    scores = targets @ queries.T
+
+    query_rows, query_scores, target_rows, target_queries, target_scores = match_top_k(
+        queries, blocks_of(targets, 13), k_per_query=5, k_per_target=3, query_block=8
+    )
+
+    expected_rows = np.argsort(-scores.T, axis=1)[:, :5]
+    np.testing.assert_array_equal(query_rows, expected_rows)
+    np.testing.assert_allclose(query_scores, np.take_along_axis(scores.T, expected_rows, axis=1), rtol=1e-5)
+
+    np.testing.assert_array_equal(target_rows, np.arange(len(targets)))
+    expected_queries = np.argsort(-scores, axis=1)[:, :3]
+    np.testing.assert_array_equal(target_queries, expected_queries)
+    np.testing.assert_allclose(target_scores, np.take_along_axis(scores, expected_queries, axis=1), rtol=1e-5)
+
+
+def test_match_top_k_has_no_padding_when_k_exceeds_targets():
+    rng = np.random.default_rng(1)
+    queries = rng.normal(size=(20, 8)).astype(np.float32)
+    targets = rng.normal(size=(4, 8)).astype(np.float32)
+
+    query_rows, query_scores, *_ = match_top_k(
+        queries, blocks_of(targets, 3), k_per_query=10, k_per_target=2, query_block=6
+    )
+
+    assert query_rows.shape == (20, 4)
+    assert np.isfinite(query_scores).all()
+    np.testing.assert_array_equal(np.sort(query_rows, axis=1), np.tile(np.arange(4), (20, 1)))
@@ -0,0 +1,56 @@
+import pytest
+
+from utils.metadata_index import MetadataIndex
+
+
+@pytest.fixture
+def index():
+    index = MetadataIndex()
+    index.add_many([
+        ("c1", {"skills": ["Python", "Go"], "location": "Bengaluru, India", "company": "Acme", "source": "LinkedIn"}),
+        ("gh_2", {"skills": ["Go", "Rust"], "location": "Navi Mumbai, India", "company": "Globex"}),
+        ("c3", {"skills": ["python"], "location": "Berlin", "company": "Acme"}),
+    ])
+    return index
+
+
+def test_no_active_filter_returns_none(index):
+    assert index.filter(None) is None
+    assert index.filter({"skills_any": [], "location": ""}) is None
+
+
+def test_skills_any_and_all(index):
+    assert index.filter({"skills_any": ["python", "Rust"]}) == {"c1", "gh_2", "c3"}
+    assert index.filter({"skills_all": ["Go", "Python"]}) == {"c1"}
+    assert index.filter({"skills_all": ["Go", "Java"]}) == set()
+
+
+def test_location_matches_parts_and_words(index):
+    assert index.filter({"location": "India"}) == {"c1", "gh_2"}
+    assert index.filter({"location": "Mumbai"}) == {"gh_2"}
+    assert index.filter({"location": ["berlin", "Bengaluru"]}) == {"c1", "c3"}
+
+
+def test_source_falls_back_to_id_prefix(index):
+    assert index.filter({"source": "GitHub"}) == {"gh_2"}
+    assert index.filter({"source": "Internal Database"}) == {"c3"}
+
+
+def test_filters_intersect(index):
+    assert index.filter({"company": "acme", "skills_any": ["Go"]}) == {"c1"}
+    assert index.filter({"company": ["Acme", "Globex"], "location": "India", "skills_all": ["Rust"]}) == {"gh_2"}
+
+
+def test_readding_a_record_replaces_its_keys(index):
+    index.add("c1", {"skills": ["Java"], "location": "Paris"})
+    assert index.filter({"skills_any": ["Go"]}) == {"gh_2"}
+    assert index.filter({"location": "Paris"}) == {"c1"}
+
+    index.remove("c1")
+    assert index.filter({"location": "Paris"}) == set()
+    assert len(index) == 2
+
+
+def test_unknown_filter_raises(index):
+    with pytest.raises(ValueError):
+        index.filter({"salary": 100})
@@ -0,0 +1,86 @@
+import pytest
+import requests
+
+from utils.rate_limiter import TokenBucket, RateLimiter
+
+
+def make_response(status, headers=None, text=""):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response._content = text.encode()
+    return response
+
+
+def test_bucket_spends_capacity_then_waits_at_the_refill_rate():
+    bucket = TokenBucket(2, 1.0)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.5, abs=0.05)
+    assert bucket.reserve() == pytest.approx(1.0, abs=0.05)
+
+
+def test_sync_spreads_remaining_budget_over_the_window():
+    bucket = TokenBucket(30, 60.0)
+    bucket.sync(remaining=0, reset_in=10.0)
+    assert bucket.reserve() == pytest.approx(10.0, abs=0.1)
+
+    bucket = TokenBucket(30, 60.0)
+    bucket.sync(remaining=5, reset_in=10.0)
+    assert bucket.rate == pytest.approx(0.5)
+    for _ in range(5):
+        assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(2.0, abs=0.1)
+
+
+def test_block_holds_back_every_caller():
+    bucket = TokenBucket(100, 1.0)
+    bucket.block(3.0)
+    assert bucket.reserve() == pytest.approx(3.0, abs=0.05)
+
+
+def test_backoff_prefers_retry_after_and_reset_headers():
+    limiter = RateLimiter({"core": (10, 1.0)}, base_delay=1.0, max_delay=60.0)
+    assert limiter.backoff_delay(0, {"Retry-After": "7"}) == 7.0
+    assert limiter.backoff_delay(0, {"Retry-After": "600"}) == 60.0
+    for attempt in range(6):
+        assert 0.0 <= limiter.backoff_delay(attempt, {}) <= min(60.0, 2 ** attempt)
+
+
+def test_request_retries_rate_limited_responses(monkeypatch):
+    limiter = RateLimiter({"core": (100, 1.0)}, max_retries=3)
+    sleeps = []
+    monkeypatch.setattr(limiter, "_sleep", lambda endpoint, seconds: sleeps.append(seconds))
+    responses = iter([
+        make_response(429, {"Retry-After": "2"}),
+        make_response(403, text="API rate limit exceeded"),
+        make_response(200),
+    ])
+
+    response = limiter.request("core", lambda: next(responses))
+
+    assert response.status_code == 200
+    assert 2.0 in sleeps
+    assert limiter.metrics()["core"]["retries"] == 2
+    assert limiter.metrics()["core"]["requests"] == 3
+
+
+def test_request_returns_other_errors_without_retrying(monkeypatch):
+    limiter = RateLimiter({"core": (100, 1.0)})
+    monkeypatch.setattr(limiter, "_sleep", lambda endpoint, seconds: None)
+    calls = []
+
+    response = limiter.request("core", lambda: calls.append(1) or make_response(403, text="Forbidden"))
+
+    assert response.status_code == 403
+    assert len(calls) == 1
+
+
+def test_request_gives_up_after_max_retries(monkeypatch):
+    limiter = RateLimiter({"core": (100, 1.0)}, max_retries=2)
+    monkeypatch.setattr(limiter, "_sleep", lambda endpoint, seconds: None)
+
+    response = limiter.request("core", lambda: make_response(429))
+
+    assert response.status_code == 429
+    assert limiter.metrics()["core"]["requests"] == 3
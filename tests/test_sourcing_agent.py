@@ -0,0 +1,154 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("langchain")
+pytest.importorskip("langchain_groq")
+
+from agents.sourcing_agent import SourcingAgent, canonicalize_queries  # noqa: E402
+from utils.database import VectorDatabase  # noqa: E402
+from utils.external_sourcing import ExternalSourcer  # noqa: E402
+
+JOB, REQUIREMENTS = "job description", "requirements"
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setenv("GITHUB_TOKEN", "test")
+    db = VectorDatabase(data_dir=str(tmp_path / "db"))
+    db.add_candidates_batch([(f"db_{i}", f"python go developer {i}", {"name": f"Internal {i}"}) for i in range(3)])
+    agent = SourcingAgent(db=db, external_sourcer=ExternalSourcer(cache_dir=str(tmp_path / "cache")))
+    yield agent
+    agent.wait_for_writes(timeout=10)
+    db.close()
+    agent.external_sourcer.cache.close()
+
+
+def run(agent, queries, max_results=5):
+    """Events of one search whose generated queries are `queries`"""
+    agent.external_sourcer.cache.set("llm_queries", agent._query_cache_key(JOB, REQUIREMENTS), queries)
+    return list(agent.iter_source_candidates(JOB, REQUIREMENTS, max_results))
+
+
+def github_candidate(query, i=0):
+    return {"id": f"gh_{query}_{i}", "source": "GitHub", "document": "",
+            "metadata": {"name": f"{query} {i}", "source": "GitHub"}}
+
+
+def test_canonicalize_strips_numbering_bullets_and_preamble():
+    text = ('Here are some search queries:\n\n1. "python machine learning"\n2) go kubernetes\n'
+            '- rust  systems\n• `java kotlin`\n')
+
+    assert canonicalize_queries(text) == ["python machine learning", "go kubernetes", "rust systems", "java kotlin"]
+
+
+def test_canonicalize_drops_near_duplicates():
+    text = "1. Python Machine Learning\n2. machine learning python\n3. python, machine learning!\n4. python ml"
+
+    assert canonicalize_queries(text) == ["Python Machine Learning", "python ml"]
+
+
+def test_canonicalize_keeps_languages_that_differ_only_in_symbols():
+    text = "C++ developer\nC# developer\nC developer\ndeveloper c++\nNode.js engineer"
+
+    assert canonicalize_queries(text) == ["C++ developer", "C# developer", "C developer", "Node.js engineer"]
+
+
+def test_slow_lookup_times_out_keeping_partial_results_and_is_cancelled(agent):
+    agent.external_sourcer.source_deadline = 0.3
+    saw_cancel = threading.Event()
+
+    def slow_github(query, max_results, cancelled=None):
+        yield github_candidate(query)
+        while not cancelled.wait(0.02):
+            pass
+        saw_cancel.set()
+
+    agent._iter_github = slow_github
+    start = time.perf_counter()
+    done = run(agent, ["python"])[-1]
+
+    assert time.perf_counter() - start < 2.0
+    timing = done["query_timings"][0]
+    assert (timing["github_status"], timing["github_count"]) == ("timeout", 1)
+    assert timing["database_status"] == "ok"
+    assert "gh_python_0" in {candidate["id"] for candidate in done["candidates"]}
+    assert saw_cancel.wait(1.0)
+
+
+def test_database_lookups_do_not_queue_behind_github(agent):
+    agent.external_sourcer.source_deadline = 0.3
+    agent._query_executor = ThreadPoolExecutor(max_workers=1)
+
+    def stuck_github(query, max_results, cancelled=None):
+        cancelled.wait(5.0)
+        yield from ()
+
+    agent._iter_github = stuck_github
+    done = run(agent, ["python", "go", "developer"])[-1]
+
+    assert [timing["database_status"] for timing in done["query_timings"]] == ["ok", "ok", "ok"]
+    assert all(timing["database_count"] > 0 for timing in done["query_timings"])
+
+
+def test_deadline_counts_from_when_a_lookup_starts(agent):
+    agent.external_sourcer.source_deadline = 0.5
+    agent._query_executor = ThreadPoolExecutor(max_workers=1)
+
+    def steady_github(query, max_results, cancelled=None):
+        time.sleep(0.25)
+        yield github_candidate(query)
+
+    agent._iter_github = steady_github
+    done = run(agent, ["python", "go", "developer"])[-1]
+
+    # Run one after another on one worker they take 0.75s, past the deadline counted from the fan-out
+    assert [timing["github_status"] for timing in done["query_timings"]] == ["ok", "ok", "ok"]
+
+
+def test_events_stream_in_order_and_done_is_ordered_by_query(agent):
+    def staggered_github(query, max_results, cancelled=None):
+        # Later queries answer first, so the stream order differs from the query order
+        time.sleep({"python": 0.2, "go": 0.1, "developer": 0.0}[query])
+        for i in range(2):
+            yield github_candidate(query, i)
+
+    agent._iter_github = staggered_github
+    queries = ["python", "go", "developer"]
+    events = run(agent, queries)
+
+    assert events[0] == {"type": "queries", "queries": queries, "progress": 0.0}
+    assert events[-1]["type"] == "done" and events[-1]["progress"] == 1.0
+    progress = [event["progress"] for event in events]
+    assert progress == sorted(progress)
+
+    finished = [(event["query"], event["source"]) for event in events if event["type"] == "source_finished"]
+    assert sorted(finished) == sorted((query, source) for query in queries for source in ("GitHub", "Internal Database"))
+    for query in queries:
+        positions = [i for i, event in enumerate(events) if event.get("query") == query]
+        assert events[positions[0]]["type"] == "query_started"
+
+    streamed = [event["candidate"]["id"] for event in events if event["type"] == "candidate"]
+    assert len(streamed) == len(set(streamed))
+    assert streamed.index("gh_developer_0") < streamed.index("gh_python_0")
+
+    done = events[-1]
+    assert done["search_queries"] == queries
+    assert [timing["query"] for timing in done["query_timings"]] == queries
+    github_ids = [candidate["id"] for candidate in done["candidates"] if candidate["source"] == "GitHub"]
+    assert github_ids == [f"gh_{query}_{i}" for query in queries for i in range(2)]
+    assert done["candidates"][:2] == [github_candidate("python", 0), github_candidate("python", 1)]
+    assert done["candidates"][2]["source"] == "Internal Database"
+
+
+def test_source_candidates_returns_the_done_payload(agent):
+    agent._iter_github = lambda query, max_results, cancelled=None: iter([github_candidate(query)])
+
+    result = agent.source_candidates("python", "python")
+
+    assert result["search_queries"] == ["python"]
+    assert result["candidates"][0]["id"] == "gh_python_0"
+    assert set(result) == {"search_queries", "candidates", "query_timings"}
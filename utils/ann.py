@@ -0,0 +1,113 @@
+from typing import List, Optional
+import os
+import numpy as np
+
+
+class IVFIndex:
+    """Inverted-file approximate nearest-neighbour index over unit vectors.
+
+    Vectors are clustered with spherical k-means into `n_lists` cells; a query
+    only scores the rows in its `n_probe` closest cells. Raising `n_probe`
+    trades latency for recall. The index only stores row numbers: the
+    vectors themselves stay in the owning EmbeddingIndex.
+    """
+
+    def __init__(self, n_lists: int, n_probe: int = 8, n_iter: int = 10, sample_size: int = 20000,
+                 seed: int = 0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.sample_size = sample_size
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self.assign = np.zeros(0, dtype=np.int32)  # global row -> cell, -1 if unassigned
+        self._lists: Optional[List[np.ndarray]] = None
+
+    def train(self, vectors: np.ndarray):
+        """Fit centroids with spherical k-means on a random sample of `vectors`"""
+        rng = np.random.default_rng(self.seed)
+        if len(vectors) > self.sample_size:
+            vectors = vectors[np.sort(rng.choice(len(vectors), self.sample_size, replace=False))]
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n_lists = min(self.n_lists, len(vectors))
+        centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+
+        for _ in range(self.n_iter):
+            labels = self._nearest(vectors, centroids)
+            counts = np.bincount(labels, minlength=n_lists)
+            # Per-cell vector sums via one sort + reduceat (np.add.at is far slower)
+            order = np.argsort(labels, kind="stable")
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            sums = np.zeros_like(centroids)
+            non_empty = counts > 0
+            sums[non_empty] = np.add.reduceat(vectors[order], starts[non_empty], axis=0)
+            empty = ~non_empty
+            if empty.any():
+                # Re-seed empty cells so every centroid keeps pulling its weight
+                sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+
+        self.centroids = centroids.astype(np.float32)
+        self.n_lists = n_lists
+
+    @staticmethod
+    def _nearest(vectors: np.ndarray, centroids: np.ndarray, block_size: int = 8192) -> np.ndarray:
+        """Closest centroid for each vector, computed in blocks to bound memory"""
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), block_size):
+            block = np.asarray(vectors[start:start + block_size], dtype=np.float32)
+            labels[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return labels
+
+    def nearest_cells(self, vectors: np.ndarray) -> np.ndarray:
+        return self._nearest(vectors, self.centroids)
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray):
+        """Assign (possibly re-assign) global rows to their nearest cells"""
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return
+        needed = int(rows.max()) + 1
+        if needed > len(self.assign):
+            self.assign = np.concatenate([self.assign, np.full(needed - len(self.assign), -1, dtype=np.int32)])
+        self.assign[rows] = self.nearest_cells(vectors)
+        self._lists = None
+
+    def remap(self, keep: np.ndarray):
+        """Drop rows where `keep` is False and renumber the rest, matching an EmbeddingIndex merge"""
+        assign = self.assign
+        if len(assign) < len(keep):
+            assign = np.concatenate([assign, np.full(len(keep) - len(assign), -1, dtype=np.int32)])
+        self.assign = assign[:len(keep)][keep]
+        self._lists = None
+
+    def _inverted_lists(self) -> List[np.ndarray]:
+        if self._lists is None:
+            order = np.argsort(self.assign, kind="stable")
+            bounds = np.searchsorted(self.assign[order], np.arange(self.n_lists + 1))
+            self._lists = [order[bounds[cell]:bounds[cell + 1]] for cell in range(self.n_lists)]
+        return self._lists
+
+    def candidates(self, query_vector: np.ndarray, n_probe: Optional[int] = None) -> np.ndarray:
+        """Rows stored in the `n_probe` cells closest to the query"""
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        scores = self.centroids @ query_vector
+        cells = np.argpartition(-scores, n_probe - 1)[:n_probe]
+        lists = self._inverted_lists()
+        return np.concatenate([lists[cell] for cell in cells])
+
+    def save(self, path: str):
+        with open(path + ".tmp", 'wb') as f:
+            np.savez(f, centroids=self.centroids, assign=self.assign,
+                     params=np.array([self.n_lists, self.n_probe, self.n_iter, self.sample_size, self.seed]))
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        with np.load(path) as data:
+            n_lists, n_probe, n_iter, sample_size, seed = (int(value) for value in data["params"])
+            index = cls(n_lists, n_probe, n_iter, sample_size, seed)
+            index.centroids = data["centroids"]
+            index.assign = data["assign"]
+        return index
@@ -0,0 +1,228 @@
+from typing import Dict, Any, Optional, Tuple, Callable, Hashable
+from collections import OrderedDict
+from concurrent.futures import Future
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class SourcingCache:
+    """Two-tier TTL cache for external sourcing results.
+
+    An in-process LRU (`memory_entries` items) sits in front of a SQLite table
+    shared by every process on the machine. Entries live in namespaces (e.g.
+    "github_search") with their own TTL, expired rows are never served, and the
+    table is pruned back to `max_entries` least-recently-used rows. Expired
+    rows are kept for `stale_grace` seconds with their HTTP validators (ETag /
+    Last-Modified) so they can be revalidated instead of refetched. Every
+    write is its own SQLite transaction, so concurrent Streamlit sessions can
+    not corrupt the file the way they could a rewritten JSON blob.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, memory_entries: int = 512,
+                 default_ttl: float = 24 * 3600, ttls: Optional[Dict[str, float]] = None,
+                 prune_every: int = 64, stale_grace: float = 7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.default_ttl = default_ttl
+        self.ttls = dict(ttls or {})
+        self.prune_every = prune_every
+        self.stale_grace = stale_grace
+
+        # (namespace, key) -> (serialized value, expires_at); values are decoded on every hit
+        # so callers can mutate what they get back without touching the cache
+        self._memory: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stats = {"hits": 0, "memory_hits": 0, "misses": 0, "expired": 0, "evictions": 0, "writes": 0,
+                       "revalidated": 0}
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                PRIMARY KEY (namespace, key)
+            );
+            CREATE INDEX IF NOT EXISTS cache_entries_accessed ON cache_entries(accessed_at);
+        """)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(cache_entries)")}
+        for column in ("etag", "last_modified"):
+            if column not in columns:
+                # Cache files created before validators were stored
+                self._db.execute(f"ALTER TABLE cache_entries ADD COLUMN {column} TEXT")
+
+    def ttl(self, namespace: str) -> float:
+        return self.ttls.get(namespace, self.default_ttl)
+
+    def _remember(self, cache_key: Tuple[str, str], value: str, expires_at: float):
+        self._memory[cache_key] = (value, expires_at)
+        self._memory.move_to_end(cache_key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """The cached value, or None if it is missing or expired"""
+        entry = self.get_entry(namespace, key)
+        return entry["value"] if entry is not None and not entry["expired"] else None
+
+    def get_entry(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        """Like get(), but also returns expired entries still in the table.
+
+        The result is {"value", "expired", "etag", "last_modified"}; an expired
+        entry counts as a miss but carries the validators for a conditional request.
+        """
+        cache_key = (namespace, key)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(cache_key)
+            if entry is not None and entry[1] > now:
+                self._memory.move_to_end(cache_key)
+                self._stats["hits"] += 1
+                self._stats["memory_hits"] += 1
+                return {"value": json.loads(entry[0]), "expired": False, "etag": None, "last_modified": None}
+            self._memory.pop(cache_key, None)
+
+            row = self._db.execute(
+                "SELECT value, expires_at, etag, last_modified FROM cache_entries WHERE namespace = ? AND key = ?",
+                cache_key
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            value, expires_at, etag, last_modified = row
+            if expires_at <= now:
+                self._stats["misses"] += 1
+                self._stats["expired"] += 1
+                return {"value": json.loads(value), "expired": True, "etag": etag, "last_modified": last_modified}
+            with self._db:
+                self._db.execute("UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                                 (now, namespace, key))
+            self._remember(cache_key, value, expires_at)
+            self._stats["hits"] += 1
+            return {"value": json.loads(value), "expired": False, "etag": etag, "last_modified": last_modified}
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None,
+            created_at: Optional[float] = None, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Store a JSON-serializable value for `ttl` seconds (the namespace TTL by default)"""
+        now = time.time()
+        expires_at = (created_at or now) + (self.ttl(namespace) if ttl is None else ttl)
+        serialized = json.dumps(value)
+        with self._lock:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO cache_entries(namespace, key, value, expires_at, accessed_at, etag, "
+                    "last_modified) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (namespace, key, serialized, expires_at, now, etag, last_modified)
+                )
+            self._remember((namespace, key), serialized, expires_at)
+            self._stats["writes"] += 1
+            self._writes += 1
+            if self._writes % self.prune_every == 0:
+                self._prune(now)
+
+    def touch(self, namespace: str, key: str, ttl: Optional[float] = None) -> bool:
+        """Restart an entry's TTL after the origin confirmed it unchanged (e.g. HTTP 304)"""
+        now = time.time()
+        expires_at = now + (self.ttl(namespace) if ttl is None else ttl)
+        with self._lock:
+            with self._db:
+                updated = self._db.execute(
+                    "UPDATE cache_entries SET expires_at = ?, accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (expires_at, now, namespace, key)
+                ).rowcount
+                row = self._db.execute("SELECT value FROM cache_entries WHERE namespace = ? AND key = ?",
+                                       (namespace, key)).fetchone()
+            if not updated or row is None:
+                return False
+            self._remember((namespace, key), row[0], expires_at)
+            self._stats["revalidated"] += 1
+            return True
+
+    def invalidate(self, namespace: str, key: Optional[str] = None):
+        """Drop one entry, or a whole namespace when `key` is None"""
+        with self._lock:
+            with self._db:
+                if key is None:
+                    self._db.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+                else:
+                    self._db.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+            for cache_key in [k for k in self._memory if k[0] == namespace and key in (None, k[1])]:
+                del self._memory[cache_key]
+
+    def _prune(self, now: float):
+        """Delete rows expired past the grace period, then the least recently used ones above `max_entries`"""
+        with self._db:
+            self._db.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now - self.stale_grace,))
+            count = self._db.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                self._db.execute(
+                    "DELETE FROM cache_entries WHERE rowid IN "
+                    "(SELECT rowid FROM cache_entries ORDER BY accessed_at LIMIT ?)", (excess,)
+                )
+                self._stats["evictions"] += excess
+
+    def prune(self):
+        with self._lock:
+            self._prune(time.time())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters for this process"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one in-flight call.
+
+    The first caller for a key runs `fn`; callers arriving while it runs
+    wait for and share its result (or exception) instead of repeating it.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
@@ -1,130 +1,318 @@
-from typing import List, Dict, Any
-import json
+from typing import List, Dict, Any, Iterable, Iterator, Tuple, Optional, Set
+import atexit
 import os
+import threading
+from utils.storage import CollectionStore, JsonCollectionStore, LogCollectionStore, SQLiteCollectionStore
+from utils.search_index import InvertedIndex
+from utils.embeddings import EmbeddingIndex
+from utils.metadata_index import MetadataIndex, FILTER_FIELDS
+from utils.matching import match_top_k
+
+SEARCH_MODES = ("vector", "keyword")
+INDEX_KINDS = SEARCH_MODES + ("metadata",)
+STORAGE_BACKENDS = ("json", "log", "sqlite")
 
 class VectorDatabase:
-    def __init__(self):
-        self.data_dir = "data/simple_db"
+    def __init__(self, data_dir: str = "data/simple_db", flush_interval: float = 2.0, max_pending: int = 100,
+                 search_mode: str = "vector", storage: str = "json", ann_threshold: Optional[int] = 50000,
+                 n_probe: int = 8):
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {search_mode}")
+        if storage not in STORAGE_BACKENDS:
+            raise ValueError(f"Unknown storage backend: {storage}")
+        self.data_dir = data_dir
+        self.search_mode = search_mode
         os.makedirs(self.data_dir, exist_ok=True)
         self.candidates_file = os.path.join(self.data_dir, "candidates.json")
         self.jobs_file = os.path.join(self.data_dir, "jobs.json")
-        
-        # Initialize empty collections
-        if not os.path.exists(self.candidates_file):
-            with open(self.candidates_file, 'w') as f:
-                json.dump({}, f)
-        
-        if not os.path.exists(self.jobs_file):
-            with open(self.jobs_file, 'w') as f:
-                json.dump({}, f)
+
+        if storage == "sqlite":
+            # Single WAL-mode SQLite file with FTS5 indexes, migrated once from the JSON files
+            db_path = os.path.join(self.data_dir, "talent.sqlite3")
+            self.candidates = SQLiteCollectionStore(db_path, "candidates", flush_interval, max_pending,
+                                                    seed_path=self.candidates_file)
+            self.jobs = SQLiteCollectionStore(db_path, "jobs", flush_interval, max_pending,
+                                              seed_path=self.jobs_file)
+        elif storage == "log":
+            # Append-only segment logs, seeded once from the JSON files if they exist
+            self.candidates = LogCollectionStore(os.path.join(self.data_dir, "candidates.log"), flush_interval,
+                                                 max_pending, seed_path=self.candidates_file)
+            self.jobs = LogCollectionStore(os.path.join(self.data_dir, "jobs.log"), flush_interval,
+                                           max_pending, seed_path=self.jobs_file)
+        else:
+            # Collections are loaded once and kept resident; writes are flushed in the background
+            self.candidates = JsonCollectionStore(self.candidates_file, flush_interval, max_pending)
+            self.jobs = JsonCollectionStore(self.jobs_file, flush_interval, max_pending)
+
+        # Search indexes are built lazily per (mode, collection) and rebuilt
+        # whenever the collection is (re)loaded from disk
+        self._lock = threading.RLock()
+        self._indexes: Dict[Any, Any] = {}
+        # Embedding matrices are saved here and memory-mapped on the next start
+        self.index_dir = os.path.join(self.data_dir, "index")
+        # Collections of at least ann_threshold documents are searched approximately (IVF)
+        self._vector_options = {"ann_threshold": ann_threshold, "n_probe": n_probe}
+        self._closed = False
+        atexit.register(self.close)
 
     def add_candidate(self, candidate_id: str, resume_text: str, metadata: Dict[str, Any]):
         """Add a candidate's resume to the database"""
-        with open(self.candidates_file, 'r') as f:
-            candidates = json.load(f)
-        
-        candidates[candidate_id] = {
-            "document": resume_text,
-            "metadata": metadata
-        }
-        
-        with open(self.candidates_file, 'w') as f:
-            json.dump(candidates, f)
+        self._put(self.candidates, candidate_id, resume_text, metadata)
 
     def add_job(self, job_id: str, job_description: str, metadata: Dict[str, Any]):
         """Add a job description to the database"""
-        with open(self.jobs_file, 'r') as f:
-            jobs = json.load(f)
-        
-        jobs[job_id] = {
-            "document": job_description,
-            "metadata": metadata
-        }
-        
-        with open(self.jobs_file, 'w') as f:
-            json.dump(jobs, f)
+        self._put(self.jobs, job_id, job_description, metadata)
 
-    def search_candidates(self, query: str, n_results: int = 5) -> Dict[str, Any]:
-        """Search for candidates matching a query (simple implementation)"""
-        try:
-            with open(self.candidates_file, 'r') as f:
-                candidates = json.load(f)
-            
-            # Simple search implementation
-            results = []
-            for id, data in candidates.items():
-                if query.lower() in data["document"].lower():
-                    results.append({
-                        "id": id,
-                        "document": data["document"],
-                        "metadata": data["metadata"]
-                    })
-            
-            results = results[:n_results]
-            return {
-                "ids": [r["id"] for r in results],
-                "documents": [r["document"] for r in results],
-                "metadatas": [r["metadata"] for r in results],
-                "distances": [1.0] * len(results)  # Placeholder distances
+    def _put(self, store: CollectionStore, record_id: str, document: str, metadata: Dict[str, Any]):
+        with self._lock:
+            record = {
+                "document": document,
+                "metadata": metadata
             }
+            store.put(record_id, record)
+            self._update_indexes(store, {record_id: record})
+
+    def _update_indexes(self, store: CollectionStore, records: Dict[str, Dict[str, Any]]):
+        """Keep already-built indexes in sync; unbuilt ones pick the records up when first used"""
+        for kind in INDEX_KINDS:
+            if (kind, id(store)) in self._indexes:
+                self._index(store, kind).add_many(self._index_input(kind, records.items()))
+
+    @staticmethod
+    def _index_input(kind: str, items: Iterable[Tuple[str, Dict[str, Any]]]):
+        field = "metadata" if kind == "metadata" else "document"
+        return ((record_id, record[field]) for record_id, record in items)
+
+    def add_candidates_batch(self, candidates: Iterable[Tuple[str, str, Dict[str, Any]]]) -> Dict[str, int]:
+        """Add or update many candidates from (candidate_id, resume_text, metadata) tuples"""
+        return self._put_batch(self.candidates, candidates)
+
+    def add_jobs_batch(self, jobs: Iterable[Tuple[str, str, Dict[str, Any]]]) -> Dict[str, int]:
+        """Add or update many jobs from (job_id, job_description, metadata) tuples"""
+        return self._put_batch(self.jobs, jobs)
+
+    def _put_batch(self, store: CollectionStore, rows: Iterable[Tuple[str, str, Dict[str, Any]]]) -> Dict[str, int]:
+        """Dedupe a batch, write it with one store call and update each built index once.
+
+        Later rows win over earlier rows with the same id. Returns counts of
+        inserted, updated and skipped records, where skipped covers rows
+        without an id, duplicates superseded within the batch and rows
+        identical to what is already stored.
+        """
+        counts = {"inserted": 0, "updated": 0, "skipped": 0}
+        batch: Dict[str, Dict[str, Any]] = {}
+        for record_id, document, metadata in rows:
+            if not record_id:
+                counts["skipped"] += 1
+                continue
+            if record_id in batch:
+                counts["skipped"] += 1
+                del batch[record_id]  # Re-insert so the batch keeps last-seen order
+            batch[record_id] = {"document": document, "metadata": metadata}
+
+        with self._lock:
+            existing = store.get_many(batch.keys())
+            changed = {}
+            for record_id, record in batch.items():
+                if record_id not in existing:
+                    counts["inserted"] += 1
+                elif existing[record_id] != record:
+                    counts["updated"] += 1
+                else:
+                    counts["skipped"] += 1
+                    continue
+                changed[record_id] = record
+
+            if changed:
+                store.put_many(changed)
+                self._update_indexes(store, changed)
+        return counts
+
+    def _index(self, store: CollectionStore, kind: str):
+        """Return an index for a collection, rebuilding it if the collection was reloaded"""
+        with self._lock:
+            if kind == "keyword" and getattr(store, "text_search", False):
+                return store  # The backend has its own full-text index (SQLite FTS5)
+            store.refresh()
+            generation, index = self._indexes.get((kind, id(store)), (None, None))
+            if generation != store.generation:
+                index = None
+                if kind == "vector":
+                    index = EmbeddingIndex.load(self._index_path(store), store.signature(), **self._vector_options)
+                generation = store.generation
+                if index is None:
+                    if kind == "vector":
+                        index = EmbeddingIndex(**self._vector_options)
+                    else:
+                        index = InvertedIndex() if kind == "keyword" else MetadataIndex()
+                    index.add_many(self._index_input(kind, store.items()))
+                    generation = store.generation
+                    if kind == "vector":
+                        self._save_vector_index(store, index, generation)
+                self._indexes[(kind, id(store))] = (generation, index)
+            return index
+
+    def _index_path(self, store: CollectionStore) -> str:
+        return os.path.join(self.index_dir, "candidates" if store is self.candidates else "jobs")
+
+    def _save_vector_index(self, store: CollectionStore, index: EmbeddingIndex, generation: int):
+        """Flush the collection first so the saved signature covers everything in the index.
+
+        `generation` is the collection generation the index was built from; if
+        taking the signature picks up another process's writes, the index is
+        stale and is not saved under the newer signature.
+        """
+        store.flush()
+        signature = store.signature()
+        if store.generation != generation:
+            return
+        try:
+            index.save(self._index_path(store), signature)
+        except OSError as e:
+            print(f"Error saving embedding index: {e}")
+
+    def search_candidates(self, query: str, n_results: int = 5, mode: str = None,
+                          filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Search for candidates matching a query by embedding cosine similarity or BM25 keyword score.
+
+        `filters` restricts the search to candidates whose metadata matches, e.g.
+        {"skills_any": ["Python", "Go"], "location": "Bengaluru", "source": "GitHub"}.
+        Supported keys are skills_any, skills_all, location, source and company;
+        they are resolved through secondary indexes before ranking.
+        """
+        unknown = set(filters or {}) - set(FILTER_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown candidate filters: {', '.join(sorted(unknown))}")
+        try:
+            return self._search(self.candidates, query, n_results, mode or self.search_mode, filters)
         except Exception as e:
             print(f"Error searching candidates: {e}")
             return {
                 "ids": [],
                 "documents": [],
                 "metadatas": [],
-                "distances": []
+                "distances": [],
+                "scores": []
             }
 
-    def search_jobs(self, query: str, n_results: int = 5) -> Dict[str, Any]:
-        """Search for jobs matching a query (simple implementation)"""
+    def iter_candidates(self, query: str, max_results: Optional[int] = None, page_size: int = 10,
+                        mode: str = None, filters: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield matching candidates best first.
+
+        Each item is {"id", "document", "metadata", "distance", "score"}; stops
+        after `max_results` items or when no more candidates match. With
+        `max_results` the collection is ranked once; without it the first
+        `page_size` are ranked and the limit doubles each time a page runs
+        out, so the number of ranking passes stays logarithmic.
+        """
+        produced = 0
+        limit = max_results if max_results is not None else page_size
+        while True:
+            results = self.search_candidates(query, n_results=limit, mode=mode, filters=filters)
+            for i in range(produced, len(results["ids"])):
+                yield {
+                    "id": results["ids"][i],
+                    "document": results["documents"][i],
+                    "metadata": results["metadatas"][i],
+                    "distance": results["distances"][i],
+                    "score": results["scores"][i]
+                }
+            produced = max(produced, len(results["ids"]))
+            if max_results is not None or len(results["ids"]) < limit:
+                break
+            limit *= 2
+
+    def search_jobs(self, query: str, n_results: int = 5, mode: str = None) -> Dict[str, Any]:
+        """Search for jobs matching a query by embedding cosine similarity or BM25 keyword score"""
         try:
-            with open(self.jobs_file, 'r') as f:
-                jobs = json.load(f)
-            
-            # Simple search implementation
-            results = []
-            for id, data in jobs.items():
-                if query.lower() in data["document"].lower():
-                    results.append({
-                        "id": id,
-                        "document": data["document"],
-                        "metadata": data["metadata"]
-                    })
-            
-            results = results[:n_results]
-            return {
-                "ids": [r["id"] for r in results],
-                "documents": [r["document"] for r in results],
-                "metadatas": [r["metadata"] for r in results],
-                "distances": [1.0] * len(results)  # Placeholder distances
-            }
+            return self._search(self.jobs, query, n_results, mode or self.search_mode)
         except Exception as e:
             print(f"Error searching jobs: {e}")
             return {
                 "ids": [],
                 "documents": [],
                 "metadatas": [],
-                "distances": []
+                "distances": [],
+                "scores": []
+            }
+
+    def _search(self, store: CollectionStore, query: str, n_results: int, mode: str,
+                filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        with self._lock:
+            allowed = self._index(store, "metadata").filter(filters) if filters else None
+            if allowed is not None and not allowed:
+                hits = []
+            else:
+                hits = self._index(store, mode).search(query, n_results, allowed=allowed)
+            records = [store.get(record_id) for record_id, _ in hits]
+            # An index restored from disk can briefly mention records lost in a crash
+            hits, records = [h for h, r in zip(hits, records) if r], [r for r in records if r]
+
+        if mode == "vector":
+            distances = [1.0 - score for _, score in hits]  # Cosine distance
+        else:
+            distances = [1.0 / (1.0 + score) for _, score in hits]  # Lower is better, as with cosine
+
+        return {
+            "ids": [record_id for record_id, _ in hits],
+            "documents": [record["document"] for record in records],
+            "metadatas": [record["metadata"] for record in records],
+            "distances": distances,
+            "scores": [score for _, score in hits]
+        }
+
+    def match_jobs_to_candidates(self, k_per_job: int = 10, k_per_candidate: int = 5,
+                                 candidate_block: int = 8192, job_block: int = 256,
+                                 include_closed: bool = False) -> Dict[str, Any]:
+        """Score all open jobs against all candidates in one blocked, vectorized pass.
+
+        Jobs are encoded in the candidate embedding space (the same one
+        search_candidates uses) and multiplied against the candidate matrix
+        `candidate_block` x `job_block` scores at a time, so memory stays
+        bounded however large the pool is. Jobs whose metadata has
+        status "closed" are skipped unless `include_closed` is set.
+
+        Returns {"jobs": {job_id: {"ids", "distances"}}, "candidates":
+        {candidate_id: {"ids", "distances"}}} with the best candidates per job
+        and the best jobs per candidate, using cosine distance.
+
+        Only the job list and a snapshot of the candidate index are taken
+        under the lock; the scoring pass itself runs without it, so searches
+        and writes are not held up while it runs.
+        """
+        with self._lock:
+            jobs = [
+                (job_id, record) for job_id, record in self.jobs.items()
+                if include_closed or str(record["metadata"].get("status", "open")).lower() != "closed"
+            ]
+            index = self._index(self.candidates, "vector").snapshot()
+        if not jobs or not len(index):
+            return {"jobs": {job_id: {"ids": [], "distances": []} for job_id, _ in jobs}, "candidates": {}}
+
+        job_vectors = index.embedder.encode([record["document"] for _, record in jobs])
+        job_rows, job_scores, candidate_rows, candidate_jobs, candidate_scores = match_top_k(
+            job_vectors, index.iter_blocks(candidate_block), k_per_job, k_per_candidate, job_block
+        )
+
+        matches = {"jobs": {}, "candidates": {}}
+        for (job_id, _), rows, scores in zip(jobs, job_rows, job_scores):
+            hits = [(index.id_at(int(row)), float(score)) for row, score in zip(rows, scores) if score > 0]
+            matches["jobs"][job_id] = {
+                "ids": [candidate_id for candidate_id, _ in hits],
+                "distances": [1.0 - score for _, score in hits]
             }
+        for row, job_indices, scores in zip(candidate_rows, candidate_jobs, candidate_scores):
+            hits = [(jobs[int(i)][0], float(score)) for i, score in zip(job_indices, scores) if score > 0]
+            matches["candidates"][index.id_at(int(row))] = {
+                "ids": [job_id for job_id, _ in hits],
+                "distances": [1.0 - score for _, score in hits]
+            }
+        return matches
 
     def get_candidate(self, candidate_id: str) -> Dict[str, Any]:
         """Get a specific candidate's information"""
         try:
-            with open(self.candidates_file, 'r') as f:
-                candidates = json.load(f)
-            
-            if candidate_id in candidates:
-                return {
-                    "ids": [candidate_id],
-                    "documents": [candidates[candidate_id]["document"]],
-                    "metadatas": [candidates[candidate_id]["metadata"]]
-                }
-            return {
-                "ids": [],
-                "documents": [],
-                "metadatas": []
-            }
+            return self._get(self.candidates, candidate_id)
         except Exception as e:
             print(f"Error getting candidate: {e}")
             return {
@@ -133,27 +321,55 @@ class VectorDatabase:
                 "metadatas": []
             }
 
+    def existing_candidate_ids(self, candidate_ids: Iterable[str]) -> Set[str]:
+        """The subset of `candidate_ids` already stored, from one batched lookup"""
+        try:
+            with self._lock:
+                return set(self.candidates.get_many(candidate_ids))
+        except Exception as e:
+            print(f"Error checking candidates: {e}")
+            return set()
+
     def get_job(self, job_id: str) -> Dict[str, Any]:
         """Get a specific job's information"""
         try:
-            with open(self.jobs_file, 'r') as f:
-                jobs = json.load(f)
-            
-            if job_id in jobs:
-                return {
-                    "ids": [job_id],
-                    "documents": [jobs[job_id]["document"]],
-                    "metadatas": [jobs[job_id]["metadata"]]
-                }
-            return {
-                "ids": [],
-                "documents": [],
-                "metadatas": []
-            }
+            return self._get(self.jobs, job_id)
         except Exception as e:
             print(f"Error getting job: {e}")
             return {
                 "ids": [],
                 "documents": [],
                 "metadatas": []
-            }
\ No newline at end of file
+            }
+
+    def _get(self, store: CollectionStore, record_id: str) -> Dict[str, Any]:
+        record = store.get(record_id)
+        if record is not None:
+            return {
+                "ids": [record_id],
+                "documents": [record["document"]],
+                "metadatas": [record["metadata"]]
+            }
+        return {
+            "ids": [],
+            "documents": [],
+            "metadatas": []
+        }
+
+    def flush(self):
+        """Persist any pending candidate/job writes and the embedding matrices to disk"""
+        with self._lock:
+            for store in (self.candidates, self.jobs):
+                store.flush()
+                generation, index = self._indexes.get(("vector", id(store)), (None, None))
+                if index is not None and generation == store.generation:
+                    self._save_vector_index(store, index, generation)
+
+    def close(self):
+        """Flush pending writes and stop the background flushers"""
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        self.candidates.close()
+        self.jobs.close()
@@ -0,0 +1,523 @@
+from typing import Dict, List, Tuple, Iterable, Iterator, Optional, Set, Any
+from collections import Counter
+from functools import lru_cache
+import copy
+import json
+import math
+import os
+import time
+import uuid
+import zlib
+import numpy as np
+from utils.search_index import tokenize
+from utils.ann import IVFIndex
+
+
+@lru_cache(maxsize=200000)
+def _hash_feature(feature: str) -> Tuple[int, int]:
+    """Stable (bucket hash, sign) for a feature; Python's hash() is salted per process"""
+    h = zlib.crc32(feature.encode("utf-8"))
+    return h & 0x7FFFFFFF, 1 if h & 0x80000000 else -1
+
+
+class HashingEmbedder:
+    """Offline text embedder: signed feature hashing of words and word bigrams with TF-IDF weights.
+
+    Document frequencies are counted for every document added, and the IDF
+    weights are refitted from them (see `refit`) once the corpus has grown
+    well past the size they were last fitted on, so no network access or
+    model download is needed.
+    """
+
+    def __init__(self, dim: int = 1024, use_bigrams: bool = True):
+        self.dim = dim
+        self.use_bigrams = use_bigrams
+        self.idf = np.ones(dim, dtype=np.float32)
+        self.df = np.zeros(dim, dtype=np.float64)
+        self.n_docs = 0  # Documents counted in df; re-added ids count again until the next full rebuild
+        self.fit_size = 0  # n_docs when the idf weights were last fitted
+        self.fitted = False
+
+    def _features(self, text: str) -> Counter:
+        tokens = tokenize(text)
+        features = Counter(tokens)
+        if self.use_bigrams:
+            features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        return features
+
+    def _buckets(self, features: Counter) -> Dict[int, float]:
+        buckets: Dict[int, float] = {}
+        for feature, tf in features.items():
+            h, sign = _hash_feature(feature)
+            bucket = h % self.dim
+            buckets[bucket] = buckets.get(bucket, 0.0) + sign * (1.0 + math.log(tf))
+        return buckets
+
+    def observe(self, features: Iterable[Counter]):
+        """Count the documents' hash buckets towards the document frequencies"""
+        for doc_features in features:
+            self.n_docs += 1
+            for bucket in {_hash_feature(feature)[0] % self.dim for feature in doc_features}:
+                self.df[bucket] += 1
+
+    def refit(self):
+        """Recompute smoothed IDF weights per hash bucket from the counted document frequencies"""
+        self.idf = (np.log((1.0 + self.n_docs) / (1.0 + self.df)) + 1.0).astype(np.float32)
+        self.fit_size = self.n_docs
+        self.fitted = True
+
+    def fit(self, texts: Iterable[str]):
+        """Count a corpus from scratch and fit IDF weights on it"""
+        self.df = np.zeros(self.dim, dtype=np.float64)
+        self.n_docs = 0
+        self.observe(self._features(text) for text in texts)
+        self.refit()
+
+    def needs_refit(self, growth: float) -> bool:
+        return self.fitted and self.n_docs >= growth * max(self.fit_size, 1)
+
+    def reweight(self, matrix: np.ndarray, old_idf: np.ndarray) -> np.ndarray:
+        """Re-express vectors encoded under `old_idf` with the current weights.
+
+        Encoded rows are L2-normalized (tf * old_idf), so dividing by old_idf
+        and renormalizing after multiplying by the new idf gives exactly what
+        encoding the original texts again would.
+        """
+        matrix = np.asarray(matrix, dtype=np.float32) * (self.idf / old_idf)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into an L2-normalized float32 matrix of shape (len(texts), dim)"""
+        return self.encode_features([self._features(text) for text in texts])
+
+    def encode_features(self, features: List[Counter]) -> np.ndarray:
+        matrix = np.zeros((len(features), self.dim), dtype=np.float32)
+        for row, doc_features in enumerate(features):
+            for bucket, weight in self._buckets(doc_features).items():
+                matrix[row, bucket] = weight
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+
+class EmbeddingIndex:
+    """Float32 matrix of document embeddings with exact cosine top-k search.
+
+    The matrix is split into a large read-only base segment and a small
+    in-memory delta segment. `save()` writes the base as .npy files that
+    `load()` reopens with numpy.memmap, so a new process can search without
+    re-encoding or reading the corpus, and worker processes share the OS page
+    cache. Inserts and updates go to the delta (an update also marks the old
+    base row dead); once the delta outgrows `merge_ratio` of the base it is
+    merged into a new base. A merge is also forced, and the IDF weights
+    refitted with every stored vector re-weighted, once the corpus has grown
+    to `idf_growth` times the size the weights were fitted on.
+
+    Collections with at least `ann_threshold` documents are searched through
+    an IVF approximate index (see utils.ann) probing `n_probe` cells; smaller
+    ones use exact brute force. Pass `ann_threshold=None` to always be exact.
+    """
+
+    orphan_grace = 600.0  # Seconds an unreferenced saved file is kept (see save)
+
+    def __init__(self, embedder: Optional[HashingEmbedder] = None, merge_ratio: float = 0.1,
+                 merge_min_rows: int = 1000, ann_threshold: Optional[int] = 50000, n_probe: int = 8,
+                 idf_growth: float = 2.0):
+        self.embedder = embedder or HashingEmbedder()
+        self.merge_ratio = merge_ratio
+        self.idf_growth = idf_growth
+        self.merge_min_rows = merge_min_rows
+        self.ann_threshold = ann_threshold
+        self.n_probe = n_probe
+        self.ann: Optional[IVFIndex] = None
+        self.layout_version = 0  # Bumped whenever global row numbers change (merge)
+
+        self._base = np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self._base_ids: Any = []
+        self._base_version = 0
+        self._base_name: Optional[str] = None  # Unique name of the saved base files, once written
+        self._base_saved = True
+        self._dead: Set[int] = set()
+        self._delta = np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self._delta_ids: List[str] = []
+        self._rows: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self._base_ids) - len(self._dead) + len(self._delta_ids)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._row_map()
+
+    @property
+    def n_rows(self) -> int:
+        """Number of global rows, including dead base rows"""
+        return len(self._base_ids) + len(self._delta_ids)
+
+    def _row_map(self) -> Dict[str, int]:
+        """id -> global row, built on first use so a memory-mapped cold start stays cheap"""
+        if self._rows is None:
+            rows = {str(doc_id): row for row, doc_id in enumerate(self._base_ids)}
+            base_size = len(self._base_ids)
+            rows.update((doc_id, base_size + row) for row, doc_id in enumerate(self._delta_ids))
+            self._rows = rows
+        return self._rows
+
+    def id_at(self, row: int) -> str:
+        base_size = len(self._base_ids)
+        return str(self._base_ids[row]) if row < base_size else self._delta_ids[row - base_size]
+
+    def row_of(self, doc_id: str) -> Optional[int]:
+        return self._row_map().get(doc_id)
+
+    def vector_at(self, row: int) -> np.ndarray:
+        base_size = len(self._base_ids)
+        return self._base[row] if row < base_size else self._delta[row - base_size]
+
+    def _append_delta(self, vectors: np.ndarray):
+        """Append rows to the delta buffer, growing its capacity geometrically"""
+        used = len(self._delta_ids)
+        needed = used + len(vectors)
+        if needed > self._delta.shape[0]:
+            capacity = max(needed, 2 * self._delta.shape[0], 64)
+            grown = np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+            grown[:used] = self._delta[:used]
+            self._delta = grown
+        self._delta[used:needed] = vectors
+
+    def add(self, doc_id: str, text: str):
+        self.add_many([(doc_id, text)])
+
+    def add_many(self, docs: Iterable[Tuple[str, str]]):
+        """Encode and insert documents, fitting IDF weights first if this is the initial build"""
+        docs = list(docs)
+        if not docs:
+            return
+        features = [self.embedder._features(text) for _, text in docs]
+        self.embedder.observe(features)
+        if not self.embedder.fitted and not len(self):
+            self.embedder.refit()
+
+        vectors = self.embedder.encode_features(features)
+        rows = self._row_map()
+        base_size = len(self._base_ids)
+        delta_size = len(self._delta_ids)
+        appended: List[np.ndarray] = []
+        appended_ids: List[str] = []
+        touched_rows: List[int] = []
+        for (doc_id, _), vector in zip(docs, vectors):
+            row = rows.get(doc_id)
+            if row is not None and row >= base_size + delta_size:
+                appended[row - base_size - delta_size] = vector  # Repeated within this call
+                continue
+            if row is not None and row >= base_size:
+                self._delta[row - base_size] = vector
+                touched_rows.append(row)
+                continue
+            if row is not None:
+                self._dead.add(row)  # The base segment is read-only; supersede the row
+            rows[doc_id] = base_size + delta_size + len(appended)
+            appended.append(vector)
+            appended_ids.append(doc_id)
+        if appended:
+            self._append_delta(np.stack(appended))
+            self._delta_ids.extend(appended_ids)
+            touched_rows.extend(range(base_size + delta_size, base_size + delta_size + len(appended)))
+
+        if self.ann is not None and touched_rows:
+            touched_rows = np.unique(touched_rows)
+            self.ann.add(touched_rows, self._delta[touched_rows - base_size])
+
+        if self.needs_merge():
+            self.merge()
+
+    def needs_merge(self) -> bool:
+        return (len(self._delta_ids) > max(self.merge_min_rows, self.merge_ratio * len(self._base_ids))
+                or self.embedder.needs_refit(self.idf_growth))
+
+    def merge(self):
+        """Fold the delta segment and dead rows into a new in-memory base segment, refitting IDF if due"""
+        live = np.ones(len(self._base_ids), dtype=bool)
+        live[list(self._dead)] = False
+        delta_size = len(self._delta_ids)
+        if self.ann is not None:
+            # Rows keep their relative order, so the IVF assignment can be carried over
+            self.ann.remap(np.concatenate([live, np.ones(delta_size, dtype=bool)]))
+        self._base = np.concatenate([self._base[live], self._delta[:delta_size]])
+        self._base_ids = [str(doc_id) for doc_id in np.asarray(self._base_ids, dtype=str)[live]] + self._delta_ids
+        self._base_saved = False
+        self._dead = set()
+        self._delta = np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self._delta_ids = []
+        self._rows = None
+        self.layout_version += 1
+
+        if self.embedder.needs_refit(self.idf_growth):
+            old_idf = self.embedder.idf
+            self.embedder.refit()
+            self._base = self.embedder.reweight(self._base, old_idf)
+            self.ann = None  # Cells were trained on the old weights; rebuilt on the next approximate search
+
+    def similarities(self, query_vector: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the query against every global row; dead rows score -inf"""
+        base_size = len(self._base_ids)
+        similarities = np.empty(self.n_rows, dtype=np.float32)
+        similarities[:base_size] = self._base @ query_vector
+        similarities[base_size:] = self._delta[:len(self._delta_ids)] @ query_vector
+        if self._dead:
+            similarities[list(self._dead)] = -np.inf
+        return similarities
+
+    def similarities_for(self, rows: np.ndarray, query_vector: np.ndarray) -> np.ndarray:
+        """Cosine similarity for a subset of global rows only; dead rows score -inf"""
+        base_size = len(self._base_ids)
+        in_base = rows < base_size
+        similarities = np.empty(len(rows), dtype=np.float32)
+        # Fancy-indexing a memory-mapped base only touches the pages of the requested rows
+        similarities[in_base] = self._base[rows[in_base]] @ query_vector
+        similarities[~in_base] = self._delta[rows[~in_base] - base_size] @ query_vector
+        if self._dead:
+            similarities[np.isin(rows, list(self._dead))] = -np.inf
+        return similarities
+
+    def top_k(self, similarities: np.ndarray, k: int, rows: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """Select the k best entries with argpartition and map them back to ids.
+
+        `similarities[i]` belongs to global row `rows[i]`, or to row i if no rows are given.
+        """
+        k = min(k, len(similarities))
+        if k <= 0:
+            return []
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return [
+            (self.id_at(int(rows[i]) if rows is not None else int(i)), float(similarities[i]))
+            for i in top if similarities[i] > 0
+        ]
+
+    def iter_blocks(self, block_size: int = 8192) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Yield (global rows, vectors) for all live rows, `block_size` rows at a time"""
+        base_size = len(self._base_ids)
+        dead = np.array(sorted(self._dead), dtype=np.int64)
+        segments = [(0, self._base), (base_size, self._delta[:len(self._delta_ids)])]
+        for offset, matrix in segments:
+            for start in range(0, len(matrix), block_size):
+                vectors = matrix[start:start + block_size]
+                rows = np.arange(offset + start, offset + start + len(vectors))
+                if len(dead):
+                    live = ~np.isin(rows, dead)
+                    rows, vectors = rows[live], vectors[live]
+                yield rows, vectors
+
+    def snapshot(self) -> "EmbeddingIndex":
+        """A frozen view for long scans outside the caller's lock.
+
+        The base segment is never modified in place (merges build a new one),
+        so it is shared; the small delta, ids and dead rows are copied.
+        """
+        view = copy.copy(self)
+        view.embedder = copy.copy(self.embedder)
+        view.ann = None
+        view._delta = self._delta[:len(self._delta_ids)].copy()
+        view._delta_ids = list(self._delta_ids)
+        view._dead = set(self._dead)
+        view._rows = None
+        return view
+
+    def use_ann(self) -> bool:
+        return self.ann_threshold is not None and len(self) >= self.ann_threshold
+
+    def build_ann(self, n_lists: Optional[int] = None):
+        """Train the IVF index on the current rows (about sqrt(N) cells by default)"""
+        n_lists = n_lists or max(1, int(np.sqrt(len(self))))
+        ann = IVFIndex(n_lists, n_probe=self.n_probe)
+        base_size = len(self._base_ids)
+        live = np.array([row for row in range(self.n_rows) if row not in self._dead]) if self._dead \
+            else np.arange(self.n_rows)
+        sample = np.random.default_rng(0).choice(live, min(len(live), ann.sample_size), replace=False)
+        ann.train(np.stack([self.vector_at(int(row)) for row in np.sort(sample)]))
+        if base_size:
+            ann.add(np.arange(base_size), self._base)
+        if self._delta_ids:
+            ann.add(np.arange(base_size, self.n_rows), self._delta[:len(self._delta_ids)])
+        self.ann = ann
+
+    def search(self, query: str, k: int = 5, exact: Optional[bool] = None,
+               allowed: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+        """Return the top-k (doc_id, cosine similarity) pairs, best first.
+
+        By default large collections go through the IVF index and small ones
+        are scanned exactly; `exact` forces one or the other. With `allowed`,
+        only those ids are scored (exactly, unless the eligible set is itself
+        large enough to warrant the IVF index).
+        """
+        if not len(self) or k <= 0:
+            return []
+        query_vector = self.embedder.encode([query])[0]
+        if not query_vector.any():
+            return []
+
+        eligible = None
+        if allowed is not None:
+            row_map = self._row_map()
+            eligible = np.array(sorted(row_map[doc_id] for doc_id in allowed if doc_id in row_map), dtype=np.int64)
+            if not len(eligible):
+                return []
+        size = len(self) if eligible is None else len(eligible)
+        use_ann = self.ann_threshold is not None and size >= self.ann_threshold if exact is None else not exact
+
+        if not use_ann:
+            if eligible is None:
+                return self.top_k(self.similarities(query_vector), k)
+            return self.top_k(self.similarities_for(eligible, query_vector), k, eligible)
+
+        if self.ann is None:
+            self.build_ann()
+        rows = np.unique(self.ann.candidates(query_vector))
+        if eligible is not None:
+            rows = rows[np.isin(rows, eligible, assume_unique=True)]
+        return self.top_k(self.similarities_for(rows, query_vector), k, rows)
+
+    def save(self, directory: str, signature: Any = None):
+        """Persist the index; `signature` identifies the collection state it was built from.
+
+        Several processes may save into the same directory. Every data file
+        gets a unique name and is written to a temporary file first, and the
+        manifest naming the current set is swapped in last with os.replace,
+        so no file another process may have memory-mapped is ever rewritten
+        in place. Files the current manifest does not name are deleted once
+        they are older than `orphan_grace` seconds.
+        """
+        os.makedirs(directory, exist_ok=True)
+        if self._base_name is not None and not self._touch_base(directory):
+            self._base_saved = False  # Cleaned up by another process; write it out again from memory
+        if not self._base_saved:
+            version = self._base_version + 1
+            name = f"{version:06d}-{uuid.uuid4().hex[:12]}"
+            self._save_array(directory, f"base-{name}.npy", np.asarray(self._base, dtype=np.float32))
+            self._save_array(directory, f"ids-{name}.npy", np.array(self._base_ids, dtype=str))
+            self._base_version = version
+            self._base_name = name
+            self._base_saved = True
+            # Drop the in-memory copy in favour of the shared page cache
+            self._base, self._base_ids = self._open_base(directory, name)
+
+        token = uuid.uuid4().hex[:12]
+        files = {"delta": f"delta-{token}.npy", "idf": f"idf-{token}.npy", "df": f"df-{token}.npy", "ann": None}
+        self._save_array(directory, files["delta"], self._delta[:len(self._delta_ids)])
+        self._save_array(directory, files["idf"], self.embedder.idf)
+        self._save_array(directory, files["df"], self.embedder.df)
+        if self.ann is not None:
+            files["ann"] = f"ann-{token}.npz"
+            self.ann.save(os.path.join(directory, files["ann"]))
+
+        manifest = {
+            "version": self._base_version,
+            "base": self._base_name,
+            "files": files,
+            "dim": self.embedder.dim,
+            "idf_fit_size": self.embedder.fit_size,
+            "idf_docs": self.embedder.n_docs,
+            "signature": signature,
+            "delta_ids": self._delta_ids,
+            "dead_rows": sorted(self._dead)
+        }
+        manifest_path = os.path.join(directory, "manifest.json")
+        tmp_path = f"{manifest_path}.{token}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+
+        self._remove_orphans(directory)
+
+    @staticmethod
+    def _save_array(directory: str, name: str, array: np.ndarray):
+        path = os.path.join(directory, name)
+        with open(path + ".tmp", 'wb') as f:
+            np.save(f, array)
+        os.replace(path + ".tmp", path)
+
+    def _touch_base(self, directory: str) -> bool:
+        """Mark the base files as in use so other processes do not clean them up; False if already gone"""
+        try:
+            for prefix in ("base", "ids"):
+                os.utime(os.path.join(directory, f"{prefix}-{self._base_name}.npy"))
+            return True
+        except OSError:
+            return False
+
+    def _remove_orphans(self, directory: str):
+        """Delete data files that the manifest on disk does not name and that are past the grace period.
+
+        Unlinking files still mapped by other processes is safe on POSIX; the
+        grace period covers files another process has written but not yet
+        published in its manifest.
+        """
+        try:
+            with open(os.path.join(directory, "manifest.json"), 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return
+        referenced = {name for name in manifest.get("files", {}).values() if name}
+        if manifest.get("base"):
+            referenced.update(f"{prefix}-{manifest['base']}.npy" for prefix in ("base", "ids"))
+        now = time.time()
+        for name in os.listdir(directory):
+            if name == "manifest.json" or name in referenced:
+                continue
+            path = os.path.join(directory, name)
+            try:
+                if now - os.path.getmtime(path) > self.orphan_grace:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _open_base(directory: str, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        base = np.load(os.path.join(directory, f"base-{name}.npy"), mmap_mode='r')
+        ids = np.load(os.path.join(directory, f"ids-{name}.npy"), mmap_mode='r')
+        return base, ids
+
+    @classmethod
+    def load(cls, directory: str, signature: Any = None, **kwargs) -> Optional["EmbeddingIndex"]:
+        """Memory-map a saved index, or return None if it is missing or was built from other data"""
+        manifest_path = os.path.join(directory, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return None
+        try:
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get("signature") is None or manifest["signature"] != signature:
+                return None
+            if "files" not in manifest:
+                return None  # Older layout without IDF statistics or unique file names; rebuild
+
+            files = manifest["files"]
+            embedder = HashingEmbedder(dim=manifest["dim"])
+            embedder.idf = np.load(os.path.join(directory, files["idf"]))
+            embedder.df = np.load(os.path.join(directory, files["df"]))
+            embedder.fit_size = manifest["idf_fit_size"]
+            embedder.n_docs = manifest["idf_docs"]
+            embedder.fitted = True
+            index = cls(embedder, **kwargs)
+            if manifest["base"]:
+                index._base, index._base_ids = cls._open_base(directory, manifest["base"])
+            index._base_version = manifest["version"]
+            index._base_name = manifest["base"]
+            index._delta = np.load(os.path.join(directory, files["delta"]))
+            index._delta_ids = manifest["delta_ids"]
+            index._dead = set(manifest["dead_rows"])
+            if index._delta.shape != (len(index._delta_ids), embedder.dim) or \
+                    index._base.shape[0] != len(index._base_ids):
+                return None
+            if files["ann"]:
+                ann = IVFIndex.load(os.path.join(directory, files["ann"]))
+                ann.n_probe = index.n_probe
+                if len(ann.assign) == index.n_rows:
+                    index.ann = ann
+            return index
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading embedding index from {directory}: {e}")
+            return None
@@ -1,56 +1,148 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed, wait, FIRST_COMPLETED
 import requests
 from bs4 import BeautifulSoup
 import os
 from dotenv import load_dotenv
 import json
-import time
 import re
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import datetime
 from urllib.parse import urlencode
+from utils.cache import SourcingCache, SingleFlight
+from utils.http_client import HttpClient
+from utils.rate_limiter import RateLimiter, GITHUB_LIMITS, GITHUB_ANONYMOUS_LIMITS, LINKEDIN_LIMITS
 
 load_dotenv()
 
+# Per-entity cache lifetimes: profiles and repo lists change slowly, language breakdowns hardly at all
+ENTITY_TTLS = {
+    "github_user": 3 * 24 * 3600,
+    "github_repos": 24 * 3600,
+    "github_languages": 7 * 24 * 3600,
+    "github_graphql": 24 * 3600,
+}
+
+# Everything a candidate needs from one user, fetched for a whole batch of aliased logins at once;
+# repositories are ordered like the REST repos_url default (by name)
+GRAPHQL_CANDIDATE_FRAGMENT = """
+fragment candidate on User {
+  databaseId login name location company bio url
+  repositories(first: 5, privacy: PUBLIC, ownerAffiliations: OWNER, orderBy: {field: NAME, direction: ASC}) {
+    totalCount
+    nodes { name primaryLanguage { name } languages(first: 20) { nodes { name } } }
+  }
+}
+"""
+
+
+def candidate_document(metadata: Dict[str, Any]) -> str:
+    """The text a normalized candidate is stored and embedded as"""
+    text_parts = [
+        f"Name: {metadata.get('name', '')}",
+        f"Location: {metadata.get('location', '')}",
+        f"Title: {metadata.get('title', '')}",
+        f"Company: {metadata.get('company', '')}",
+        f"Skills: {', '.join(metadata.get('skills', []))}",
+        f"Experience: {metadata.get('experience', '')}",
+        f"Education: {metadata.get('education', '')}",
+        f"Bio: {metadata.get('bio', '')}"
+    ]
+    return "\n".join(text_parts)
+
+
+def _trim_profile(user_data: Dict[str, Any]) -> Dict[str, Any]:
+    """The profile fields enrichment reads"""
+    return {field: user_data.get(field) for field in ('name', 'location', 'public_repos', 'company', 'bio')
+            if field in user_data}
+
+
+def _trim_search_page(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Search hits, keeping only what enrichment reads"""
+    return [{field: item.get(field) for field in ('id', 'login', 'url', 'repos_url', 'html_url')}
+            for item in data.get('items', [])]
+
+
+def _trim_repos(repos_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Top 5 repos, keeping only what enrichment reads"""
+    return [{field: repo.get(field) for field in ('id', 'name', 'language', 'languages_url')}
+            for repo in repos_data[:5]]  # Look at top 5 repos
+
+
 class ExternalSourcer:
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None, http_client: Optional[HttpClient] = None,
+                 cache_dir: str = "data/sourcing_cache"):
         self.linkedin_api_key = os.getenv("LINKEDIN_API_KEY")
         self.linkedin_secret = os.getenv("LINKEDIN_CLIENT_SECRET")
         self.github_token = os.getenv("GITHUB_TOKEN")
-        self.cache_dir = "data/sourcing_cache"
+        # Overridable so sourcing can run against a local stand-in (see benchmarks/sourcing_replay.py)
+        self.github_api_url = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+        self.github_graphql_url = os.getenv("GITHUB_GRAPHQL_URL", f"{self.github_api_url}/graphql")
+        self.linkedin_api_url = os.getenv("LINKEDIN_API_URL", "https://api.linkedin.com").rstrip("/")
+        self.cache_dir = cache_dir
         os.makedirs(self.cache_dir, exist_ok=True)
+        self.cache = SourcingCache(
+            os.path.join(self.cache_dir, "sourcing_cache.db"),
+            max_entries=int(os.getenv("SOURCING_CACHE_MAX_ENTRIES", "10000")),
+            default_ttl=24 * 3600,  # Cache query results for 24 hours
+            ttls=ENTITY_TTLS
+        )
+        # Concurrent requests for the same entity share one API call
+        self._inflight = SingleFlight()
+
+        # Shared pool for concurrent GitHub profile enrichment. Each query enriches windows of
+        # `max_workers` users, and up to `parallel_queries` queries run at once (see SourcingAgent),
+        # so the pool holds a window's worth of workers per query instead of making them take turns
+        self.max_workers = int(os.getenv("GITHUB_MAX_WORKERS", "8"))
+        self.parallel_queries = int(os.getenv("SOURCING_QUERY_WORKERS", "8"))
+        self.enrichment_workers = self.max_workers * self.parallel_queries
+        self._executor = ThreadPoolExecutor(max_workers=self.enrichment_workers, thread_name_prefix="github")
+        # "rest" (default) makes 2-7 calls per user through the per-entity caches, coalesced and
+        # revalidated with ETags; "graphql" batches enrichment into one query per 10-25 users but
+        # bypasses those caches; "auto" uses GraphQL whenever a token is available (it requires one)
+        self.github_enrichment = os.getenv("GITHUB_ENRICHMENT", "rest")
+        self.graphql_batch_size = min(max(int(os.getenv("GITHUB_GRAPHQL_BATCH_SIZE", "20")), 10), 25)
+
+        # Sources are queried side by side, each with its own deadline
+        self._source_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="source")
+        self.source_deadline = float(os.getenv("SOURCING_DEADLINE_SECONDS", "15"))
+
+        # One limiter shared by every worker thread, with separate search/core/linkedin budgets
+        github_limits = GITHUB_LIMITS if self.github_token else GITHUB_ANONYMOUS_LIMITS
+        self.rate_limiter = rate_limiter or RateLimiter({**github_limits, **LINKEDIN_LIMITS})
         
-        # Initialize API sessions
-        self.github_session = requests.Session()
+        # One pooled client (keep-alive, timeouts, retries) for every outbound call
+        self.http = http_client or HttpClient(
+            timeout=(3.05, float(os.getenv("SOURCING_REQUEST_TIMEOUT", "10"))),
+            pool_maxsize=max(32, self.enrichment_workers)
+        )
+        # Sent per request so the GitHub token never reaches other hosts
+        self.github_headers = {}
         if self.github_token:
-            self.github_session.headers.update({
+            self.github_headers = {
                 'Authorization': f'token {self.github_token}',
                 'Accept': 'application/vnd.github.v3+json'
-            })
+            }
 
-    def search_linkedin(self, query: str) -> List[Dict[str, Any]]:
+    def search_linkedin(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
         """Search for candidates on LinkedIn using their REST API"""
-        cache_file = os.path.join(self.cache_dir, "linkedin_cache.json")
-        cache_duration = timedelta(hours=24)  # Cache results for 24 hours
-        
         # Check cache first
-        if os.path.exists(cache_file):
-            with open(cache_file, 'r') as f:
-                cached_data = json.load(f)
-                if query in cached_data:
-                    cache_time = datetime.fromisoformat(cached_data[query]['timestamp'])
-                    if datetime.now() - cache_time < cache_duration:
-                        return cached_data[query]['results']
+        cache_key = f"{max_results}:{query}"
+        cached = self.cache.get("linkedin_search", cache_key)
+        if cached is not None:
+            return cached
 
         try:
             # LinkedIn API endpoint for Talent Search
-            endpoint = "https://api.linkedin.com/v2/talentSearch"
+            endpoint = f"{self.linkedin_api_url}/v2/talentSearch"
             
             # Build the search criteria
             params = {
                 'q': 'people',
                 'keywords': query,
                 'start': 0,
-                'count': 10,  # Number of results per page
+                'count': max_results,  # Number of results per page
                 'fields': 'id,firstName,lastName,headline,location,industry,positions,skills'
             }
             
@@ -60,7 +152,9 @@ class ExternalSourcer:
                 'Content-Type': 'application/json'
             }
             
-            response = requests.get(endpoint, params=params, headers=headers)
+            response = self.rate_limiter.request(
+                "linkedin", lambda: self.http.get(endpoint, params=params, headers=headers)
+            )
             response.raise_for_status()
             data = response.json()
             
@@ -83,114 +177,251 @@ class ExternalSourcer:
             print(f"LinkedIn API error: {str(e)}")
             return []
 
-        # Cache the results with timestamp
-        if os.path.exists(cache_file):
-            with open(cache_file, 'r') as f:
-                cached_data = json.load(f)
-        else:
-            cached_data = {}
-        
-        cached_data[query] = {
-            'timestamp': datetime.now().isoformat(),
-            'results': candidates
-        }
-        
-        with open(cache_file, 'w') as f:
-            json.dump(cached_data, f)
+        # Cache the results (24h TTL)
+        self.cache.set("linkedin_search", cache_key, candidates)
 
         return candidates
 
-    def search_github(self, query: str) -> List[Dict[str, Any]]:
+    def search_github(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
         """Search for candidates on GitHub using their REST API"""
-        cache_file = os.path.join(self.cache_dir, "github_cache.json")
-        cache_duration = timedelta(hours=24)  # Cache results for 24 hours
-        
-        # Check cache first
-        if os.path.exists(cache_file):
-            with open(cache_file, 'r') as f:
-                cached_data = json.load(f)
-                if query in cached_data:
-                    cache_time = datetime.fromisoformat(cached_data[query]['timestamp'])
-                    if datetime.now() - cache_time < cache_duration:
-                        return cached_data[query]['results']
-
+        candidates = []
         try:
-            # GitHub Search API endpoint
-            endpoint = "https://api.github.com/search/users"
-            
+            for candidate in self.iter_github(query, max_results):
+                candidates.append(candidate)
+        except requests.exceptions.RequestException as e:
+            print(f"GitHub API error: {str(e)}")
+        return candidates
+
+    def iter_github(self, query: str, max_results: int = 10,
+                    cancelled: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        """Yield enriched GitHub candidates for a query, best match first, paging lazily.
+
+        Search pages (up to 100 hits each) are fetched only when the previous
+        one is used up, and users are enriched in small concurrent windows as
+        the caller consumes them, so taking 5 results costs 5 enrichments.
+        Pages are cached for 24h and revalidated with conditional requests;
+        the enrichment behind them comes from the per-entity caches.
+
+        Once `cancelled` is set, no further page or enrichment window is
+        started, so an abandoned lookup stops taking rate-limit slots.
+        """
+        # GitHub Search API endpoint
+        endpoint = f"{self.github_api_url}/search/users"
+        per_page = min(max(max_results, 1), 100)
+        produced = 0
+        page = 1
+        # Organizations are not candidates, and GraphQL's user(login:) cannot resolve them
+        search_query = f"{query} type:user"
+        while produced < max_results:
+            if cancelled is not None and cancelled.is_set():
+                return
             # Build the search query
             params = {
-                'q': query,
+                'q': search_query,
                 'sort': 'repositories',
                 'order': 'desc',
-                'per_page': 10
+                'per_page': per_page,
+                'page': page
             }
-            
-            response = self.github_session.get(endpoint, params=params)
+            items = self._github_cached("github_search", f"{per_page}:{page}:{search_query}", endpoint,
+                                        transform=_trim_search_page, params=params, endpoint_class="search")
+            # Enrich one GraphQL batch or one pool's worth of REST users at a time
+            window_size = self.graphql_batch_size if self._use_graphql() else self.max_workers
+            i = 0
+            while i < len(items) and produced < max_results:
+                if cancelled is not None and cancelled.is_set():
+                    return
+                window = items[i:i + min(window_size, max_results - produced)]
+                i += len(window)
+                for candidate in self._enrich_github_users(window):
+                    produced += 1
+                    yield candidate
+            # GitHub only serves the first 1000 search results
+            if len(items) < per_page or page * per_page >= 1000:
+                break
+            page += 1
+
+    def _github_get(self, url: str, params: Optional[Dict[str, Any]] = None, endpoint_class: str = "core",
+                    headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """GET a GitHub API URL through the rate limiter"""
+        headers = {**self.github_headers, **(headers or {})}
+        return self.rate_limiter.request(endpoint_class, lambda: self.http.get(url, params=params, headers=headers))
+
+    def _github_cached(self, namespace: str, key: Any, url: str,
+                       transform: Callable[[Any], Any] = lambda data: data,
+                       params: Optional[Dict[str, Any]] = None, endpoint_class: str = "core") -> Any:
+        """Fetch a GitHub resource through the cache, coalescing concurrent fetches.
+
+        `transform` turns the API payload into the cached value (trimming it, or
+        enriching search hits). Expired entries are revalidated with
+        If-None-Match / If-Modified-Since: a 304 restarts the TTL and returns
+        the cached value without downloading or transforming anything, and
+        GitHub does not count it against the rate limit.
+        """
+        key = str(key)
+        entry = self.cache.get_entry(namespace, key)
+        if entry is not None and not entry["expired"]:
+            return entry["value"]
+
+        def fetch():
+            headers = {}
+            if entry is not None and entry["etag"]:
+                headers['If-None-Match'] = entry["etag"]
+            if entry is not None and entry["last_modified"]:
+                headers['If-Modified-Since'] = entry["last_modified"]
+            response = self._github_get(url, params, endpoint_class, headers)
+            if response.status_code == 304 and entry is not None:
+                if not self.cache.touch(namespace, key):
+                    self.cache.set(namespace, key, entry["value"], etag=entry["etag"],
+                                   last_modified=entry["last_modified"])
+                return entry["value"]
             response.raise_for_status()
-            data = response.json()
-            
-            candidates = []
-            for user in data.get('items', []):
-                # Get detailed user information
-                user_response = self.github_session.get(user['url'])
-                user_response.raise_for_status()
-                user_data = user_response.json()
-                
-                # Get user's repositories
-                repos_response = self.github_session.get(user['repos_url'])
-                repos_response.raise_for_status()
-                repos_data = repos_response.json()
-                
-                # Extract languages from repositories
-                languages = set()
-                for repo in repos_data[:5]:  # Look at top 5 repos
-                    if repo.get('language'):
-                        languages.add(repo['language'])
-                    
-                    # Get languages breakdown for the repo
-                    if repo.get('languages_url'):
-                        lang_response = self.github_session.get(repo['languages_url'])
-                        if lang_response.status_code == 200:
-                            languages.update(lang_response.json().keys())
-                
-                candidate = {
-                    "id": f"gh_{user['id']}",
-                    "username": user['login'],
-                    "name": user_data.get('name', ''),
-                    "location": user_data.get('location', 'Remote'),
-                    "repositories": [repo['name'] for repo in repos_data[:5]],
-                    "languages": list(languages),
-                    "contributions": user_data.get('public_repos', 0),
-                    "company": user_data.get('company', ''),
-                    "bio": user_data.get('bio', ''),
-                    "source": "GitHub",
-                    "profile_url": user['html_url']
-                }
-                candidates.append(candidate)
-                
-                # Respect GitHub's rate limiting
-                time.sleep(1)
+            value = transform(response.json())
+            self.cache.set(namespace, key, value, etag=response.headers.get('ETag'),
+                           last_modified=response.headers.get('Last-Modified'))
+            return value
 
-        except requests.exceptions.RequestException as e:
-            print(f"GitHub API error: {str(e)}")
-            return []
+        return self._inflight.do((namespace, key), fetch)
 
-        # Cache the results with timestamp
-        if os.path.exists(cache_file):
-            with open(cache_file, 'r') as f:
-                cached_data = json.load(f)
-        else:
-            cached_data = {}
-        
-        cached_data[query] = {
-            'timestamp': datetime.now().isoformat(),
-            'results': candidates
-        }
-        
-        with open(cache_file, 'w') as f:
-            json.dump(cached_data, f)
+    def _enrich_github_users(self, users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Turn search hits into candidate dicts, through GraphQL batches or per-user REST calls"""
+        if self._use_graphql():
+            return self._enrich_github_users_graphql(users)
+        return self._enrich_github_users_rest(users)
+
+    def _use_graphql(self) -> bool:
+        return self.github_enrichment == "graphql" or (self.github_enrichment == "auto" and bool(self.github_token))
+
+    def _enrich_github_users_graphql(self, users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Enrich search hits with one aliased GraphQL query per batch of users.
+
+        Batches run concurrently on the shared pool and each candidate is
+        cached per user. A batch that fails as a whole (network error,
+        GraphQL errors without data) falls back to REST enrichment; users the
+        query cannot resolve are skipped, as REST skips failed profiles.
+        """
+        candidates: Dict[str, Dict[str, Any]] = {}
+        pending = []
+        for user in users:
+            cached = self.cache.get("github_graphql", str(user['id']))
+            if cached is not None:
+                candidates[cached["id"]] = cached
+            else:
+                pending.append(user)
+
+        batches = [pending[i:i + self.graphql_batch_size] for i in range(0, len(pending), self.graphql_batch_size)]
+        futures = [self._executor.submit(self._graphql_batch, batch) for batch in batches]
+        for batch, future in zip(batches, futures):
+            try:
+                candidates.update(future.result())
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"GitHub GraphQL error, falling back to REST: {str(e)}")
+                candidates.update((candidate["id"], candidate) for candidate in self._enrich_github_users_rest(batch))
+
+        return [candidates[f"gh_{user['id']}"] for user in users if f"gh_{user['id']}" in candidates]
+
+    def _graphql_batch(self, users: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Fetch one batch of users in a single GraphQL query; candidate id -> candidate"""
+        fields = "\n".join(f"  u{i}: user(login: {json.dumps(user['login'])}) {{ ...candidate }}"
+                           for i, user in enumerate(users))
+        query = f"query {{\n{fields}\n}}\n{GRAPHQL_CANDIDATE_FRAGMENT}"
+        response = self.rate_limiter.request(
+            "graphql", lambda: self.http.request("POST", self.github_graphql_url, json={"query": query},
+                                                 headers=self.github_headers)
+        )
+        response.raise_for_status()
+        payload = response.json()
+        data = payload.get("data")
+        if not data:
+            raise ValueError(f"GraphQL errors: {payload.get('errors')}")
+
+        candidates = {}
+        for i, user in enumerate(users):
+            node = data.get(f"u{i}")
+            if node is None:
+                continue
+            repos = node['repositories']['nodes']
+            languages = {repo['primaryLanguage']['name'] for repo in repos if repo.get('primaryLanguage')}
+            for repo in repos:
+                languages.update(language['name'] for language in repo['languages']['nodes'])
+            candidate = {
+                "id": f"gh_{user['id']}",
+                "username": user['login'],
+                "name": node.get('name'),
+                "location": node.get('location'),
+                "repositories": [repo['name'] for repo in repos],
+                "languages": list(languages),
+                "contributions": node['repositories']['totalCount'],
+                "company": node.get('company'),
+                "bio": node.get('bio'),
+                "source": "GitHub",
+                "profile_url": user['html_url']
+            }
+            self.cache.set("github_graphql", str(user['id']), candidate)
+            candidates[candidate["id"]] = candidate
+        return candidates
+
+    def _enrich_github_users_rest(self, users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fetch profile, repos and repo languages for search hits concurrently.
+
+        Every user and repos request is submitted to the shared pool at once,
+        and each user's language requests are queued as soon as their repo list
+        arrives, so one slow profile no longer holds up the rest. Profiles,
+        repo lists and language breakdowns are cached per entity, so users
+        returned by several queries are only fetched once. Results keep the
+        search order; users whose profile or repos request fails are skipped,
+        and failed language lookups are ignored.
+        """
+        user_futures = [
+            self._executor.submit(self._github_cached, "github_user", user['id'], user['url'], _trim_profile)
+            for user in users
+        ]
+        repo_futures = [
+            self._executor.submit(self._github_cached, "github_repos", user['id'], user['repos_url'], _trim_repos)
+            for user in users
+        ]
 
+        language_futures: Dict[int, List[Future]] = {}
+        for future in as_completed(repo_futures):
+            i = repo_futures.index(future)
+            if future.exception() is None:
+                language_futures[i] = [
+                    self._executor.submit(self._github_cached, "github_languages",
+                                          repo.get('id') or repo['languages_url'], repo['languages_url'])
+                    for repo in future.result()
+                    if repo.get('languages_url')
+                ]
+
+        candidates = []
+        for i, user in enumerate(users):
+            try:
+                user_data = user_futures[i].result()
+                repos_data = repo_futures[i].result()
+            except requests.exceptions.RequestException as e:
+                print(f"GitHub API error enriching {user.get('login')}: {str(e)}")
+                continue
+
+            # Extract languages from repositories
+            languages = {repo['language'] for repo in repos_data if repo.get('language')}
+            for future in language_futures.get(i, []):
+                try:
+                    languages.update(future.result().keys())
+                except requests.exceptions.RequestException:
+                    pass
+
+            candidates.append({
+                "id": f"gh_{user['id']}",
+                "username": user['login'],
+                "name": user_data.get('name', ''),
+                "location": user_data.get('location', 'Remote'),
+                "repositories": [repo['name'] for repo in repos_data],
+                "languages": list(languages),
+                "contributions": user_data.get('public_repos', 0),
+                "company": user_data.get('company', ''),
+                "bio": user_data.get('bio', ''),
+                "source": "GitHub",
+                "profile_url": user['html_url']
+            })
         return candidates
 
     def _calculate_experience(self, positions: List[Dict]) -> str:
@@ -243,41 +474,80 @@ class ExternalSourcer:
                 "experience": candidate.get("experience", ""),
                 "education": candidate.get("education", ""),
                 "profile_url": candidate.get("profile_url", ""),
-                "bio": candidate.get("bio", "")
+                "bio": candidate.get("bio", ""),
+                "source": candidate.get("source", "Unknown")
             }
         }
         
         # Create a text representation for the vector database
-        text_parts = [
-            f"Name: {normalized['metadata']['name']}",
-            f"Location: {normalized['metadata']['location']}",
-            f"Title: {normalized['metadata']['title']}",
-            f"Company: {normalized['metadata']['company']}",
-            f"Skills: {', '.join(normalized['metadata']['skills'])}",
-            f"Experience: {normalized['metadata']['experience']}",
-            f"Education: {normalized['metadata']['education']}",
-            f"Bio: {normalized['metadata']['bio']}"
-        ]
-        normalized["document"] = "\n".join(text_parts)
+        normalized["document"] = candidate_document(normalized["metadata"])
         
         return normalized
 
-    def search_all_sources(self, query: str) -> List[Dict[str, Any]]:
-        """Search across all available sources"""
-        all_candidates = []
-        
-        # Search LinkedIn if API key is available
+    def _enabled_sources(self) -> Dict[str, Callable[[str, int], List[Dict[str, Any]]]]:
+        """Sources with credentials configured, in result order"""
+        sources = {}
         if self.linkedin_api_key and self.linkedin_secret:
-            linkedin_results = self.search_linkedin(query)
-            for candidate in linkedin_results:
-                candidate["source"] = "LinkedIn"
-                all_candidates.append(self.normalize_candidate_data(candidate))
-        
-        # Search GitHub if token is available
+            sources["LinkedIn"] = self.search_linkedin
         if self.github_token:
-            github_results = self.search_github(query)
-            for candidate in github_results:
-                candidate["source"] = "GitHub"
-                all_candidates.append(self.normalize_candidate_data(candidate))
-        
-        return all_candidates
+            sources["GitHub"] = self.search_github
+        return sources
+
+    def iter_sources(self, query: str, deadlines: Optional[Dict[str, float]] = None,
+                     max_results: int = 10) -> Iterator[Dict[str, Any]]:
+        """Query every configured source concurrently and yield each outcome as soon as it is known.
+
+        Each yielded dict has "source", "status" ("ok", "error" or "timeout"),
+        "latency" in seconds and normalized "candidates". A source still
+        running at its deadline (`deadlines[name]`, default
+        `source_deadline`) is reported as a timeout and left to finish in the
+        background, where its results still land in the cache.
+        """
+        start = time.monotonic()
+        futures = {
+            self._source_executor.submit(search, query, max_results): name for name, search in self._enabled_sources().items()
+        }
+        deadline_at = {name: start + (deadlines or {}).get(name, self.source_deadline) for name in futures.values()}
+        pending = set(futures)
+        while pending:
+            timeout = max(0.0, min(deadline_at[futures[future]] for future in pending) - time.monotonic())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for future in sorted(done, key=lambda f: futures[f]):
+                name = futures[future]
+                try:
+                    candidates = [self.normalize_candidate_data({**candidate, "source": name})
+                                  for candidate in future.result()]
+                    yield {"source": name, "status": "ok", "latency": now - start, "candidates": candidates}
+                except Exception as e:
+                    print(f"Error searching {name}: {str(e)}")
+                    yield {"source": name, "status": "error", "latency": now - start, "candidates": [],
+                           "error": str(e)}
+            for future in sorted((f for f in pending if deadline_at[futures[f]] <= now), key=lambda f: futures[f]):
+                pending.discard(future)
+                yield {"source": futures[future], "status": "timeout", "latency": now - start, "candidates": []}
+
+    def search_sources(self, query: str, deadlines: Optional[Dict[str, float]] = None,
+                       max_results: int = 10) -> Dict[str, Any]:
+        """Search all sources concurrently, returning what finished in time plus per-source status.
+
+        Candidates are ordered by source (LinkedIn, then GitHub) regardless of
+        which finished first; "sources" maps each source to its status, latency
+        and candidate count.
+        """
+        results = {outcome["source"]: outcome for outcome in self.iter_sources(query, deadlines, max_results)}
+        candidates = []
+        sources = {}
+        for name in self._enabled_sources():
+            outcome = results[name]
+            candidates.extend(outcome["candidates"])
+            sources[name] = {"status": outcome["status"], "latency": outcome["latency"],
+                             "count": len(outcome["candidates"])}
+            if "error" in outcome:
+                sources[name]["error"] = outcome["error"]
+        return {"candidates": candidates, "sources": sources}
+
+    def search_all_sources(self, query: str, deadlines: Optional[Dict[str, float]] = None,
+                           max_results: int = 10) -> List[Dict[str, Any]]:
+        """Search across all available sources, up to `max_results` candidates from each"""
+        return self.search_sources(query, deadlines, max_results)["candidates"]
@@ -0,0 +1,120 @@
+from typing import Dict, Any, Optional, Tuple, Union
+from urllib.parse import urlsplit
+import bisect
+import threading
+import time
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with approximate percentiles"""
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total_ms = 0.0
+
+    def record(self, ms: float):
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.total_ms += ms
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (inf if past the last bound)"""
+        count = sum(self.counts)
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.bounds[i] if i < len(self.bounds) else float("inf")
+        return float("inf")
+
+    def summary(self) -> Dict[str, Any]:
+        count = sum(self.counts)
+        labels = [f"<={bound}ms" for bound in self.bounds] + [f">{self.bounds[-1]}ms"]
+        return {
+            "count": count,
+            "mean_ms": self.total_ms / count if count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class HttpClient:
+    """Shared HTTP client for all outbound sourcing calls.
+
+    One requests.Session with keep-alive connection pools (`pool_maxsize`
+    connections per host, overridable per host prefix via `host_pool_sizes`),
+    default (connect, read) timeouts, retries with backoff for idempotent
+    methods on connection errors and 5xx responses, gzip negotiation (off
+    with `gzip=False`, which asks for uncompressed bodies), and a
+    per-host latency histogram. Rate-limit responses (429/403) are left to the
+    RateLimiter. Pass `transport` (any requests adapter) to route every
+    request through a fake or recording backend instead of the network.
+    """
+
+    def __init__(self, timeout: Union[float, Tuple[float, float]] = (3.05, 10.0), pool_connections: int = 10,
+                 pool_maxsize: int = 32, host_pool_sizes: Optional[Dict[str, int]] = None, retries: int = 3,
+                 backoff_factor: float = 0.5, gzip: bool = True, transport: Optional[BaseAdapter] = None):
+        self.timeout = timeout
+        self.session = requests.Session()
+        # requests sends gzip, deflate by default, so opting out has to override it
+        self.session.headers['Accept-Encoding'] = 'gzip, deflate' if gzip else 'identity'
+
+        if transport is not None:
+            self.mount("https://", transport)
+            self.mount("http://", transport)
+        else:
+            self.retry = Retry(
+                total=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=(500, 502, 503, 504),
+                allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+                raise_on_status=False,
+            )
+            for prefix in ("https://", "http://"):
+                self.mount(prefix, HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                               max_retries=self.retry))
+            for prefix, size in (host_pool_sizes or {}).items():
+                self.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=self.retry))
+
+        self._latency: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def mount(self, prefix: str, adapter: BaseAdapter):
+        """Route requests whose URL starts with `prefix` through `adapter`"""
+        self.session.mount(prefix, adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request with the default timeout, recording its latency under the URL's host"""
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.perf_counter()
+        try:
+            return self.session.request(method, url, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            host = urlsplit(url).netloc
+            with self._lock:
+                histogram = self._latency.get(host)
+                if histogram is None:
+                    histogram = self._latency[host] = LatencyHistogram()
+                histogram.record(elapsed_ms)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def latency_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-host request count, mean and approximate p50/p95 latency, and bucket counts"""
+        with self._lock:
+            return {host: histogram.summary() for host, histogram in self._latency.items()}
+
+    def close(self):
+        self.session.close()
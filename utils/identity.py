@@ -0,0 +1,196 @@
+from typing import Dict, Any, List, Optional, Set, Tuple
+from difflib import SequenceMatcher
+from urllib.parse import urlsplit
+import re
+import unicodedata
+from utils.search_index import tokenize
+from utils.external_sourcing import candidate_document
+
+# Preferred canonical record when a cluster spans sources; already-stored records win
+SOURCE_PRIORITY = {"Internal Database": 0, "LinkedIn": 1, "GitHub": 2}
+
+
+def name_tokens(name: Any) -> List[str]:
+    """Lowercase, accent-free name tokens in their original order"""
+    text = unicodedata.normalize("NFKD", str(name or "")).encode("ascii", "ignore").decode().lower()
+    return re.findall(r"[a-z0-9]+", text)
+
+
+def normalize_name(name: Any) -> str:
+    """Name tokens sorted, so "Sharma Rahul" and "Rahul Sharma" compare equal"""
+    return " ".join(sorted(name_tokens(name)))
+
+
+def normalize_location(location: Any) -> str:
+    """The first part of a location ("Bengaluru, India" -> "bengaluru"), empty if unknown or remote"""
+    first = str(location or "").split(",")[0].strip().lower()
+    return "" if first in ("", "remote", "anywhere") else " ".join(first.split())
+
+
+def normalize_profile_url(url: Any) -> str:
+    url = str(url or "").strip().lower()
+    url = re.sub(r"^[a-z]+://", "", url)
+    url = re.sub(r"^www\.", "", url)
+    return url.split("?")[0].split("#")[0].rstrip("/")
+
+
+def id_prefix(candidate_id: Any) -> Optional[str]:
+    """The namespace of an id such as "gh_123" or "li_abc"; ids in one namespace are distinct accounts"""
+    match = re.match(r"^([a-z]+)_", str(candidate_id or ""))
+    return match.group(1) if match else None
+
+
+def blocking_keys(candidate: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """(strong keys, fuzzy keys) for a normalized candidate.
+
+    The strong key (profile URL) identifies a person on its own. The fuzzy
+    key (surname + location) only groups records that are then scored
+    pairwise; records without a location get none.
+    """
+    metadata = candidate.get("metadata") or {}
+    strong = []
+    url = normalize_profile_url(metadata.get("profile_url"))
+    if url:
+        strong.append(f"url:{url}")
+
+    fuzzy = []
+    tokens = name_tokens(metadata.get("name"))
+    location = normalize_location(metadata.get("location"))
+    # Single-token names (often usernames) are too ambiguous to block on
+    if len(tokens) >= 2 and location:
+        fuzzy.append(f"name:{tokens[-1]}|{location}")
+    return strong, fuzzy
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def _identities(candidate: Dict[str, Any]) -> Dict[Tuple[str, str], str]:
+    """Account identities that rule out a match with a different value under the same key"""
+    identities = {}
+    prefix = id_prefix(candidate.get("id"))
+    if prefix:
+        identities[("id", prefix)] = str(candidate.get("id"))
+    url = normalize_profile_url((candidate.get("metadata") or {}).get("profile_url"))
+    if url:
+        identities[("host", urlsplit("//" + url).netloc)] = url
+    return identities
+
+
+class IdentityResolver:
+    """Merges records of the same person found under different ids or sources.
+
+    Records are grouped by blocking keys, so comparisons only happen inside
+    small blocks and the cost stays close to linear in the number of
+    records. A shared strong key merges directly. Inside a fuzzy block, a pair must
+    have similar names (at least `name_threshold`) and enough corroborating
+    evidence: a shared company counts 1, plus the overlap of skills and of
+    bio words (Jaccard), adding up to at least `min_evidence`. Two
+    different profile URLs on the same host, or two different ids in the
+    same namespace (gh_1 vs gh_2), are never merged, even transitively.
+    Blocks larger than `max_block_size` are skipped as too generic.
+    Clusters are merged with union-find into one canonical candidate that
+    lists every source record under "provenance".
+    """
+
+    def __init__(self, name_threshold: float = 0.85, min_evidence: float = 0.5, max_block_size: int = 50):
+        self.name_threshold = name_threshold
+        self.min_evidence = min_evidence
+        self.max_block_size = max_block_size
+
+    def match_score(self, a: Dict[str, Any], b: Dict[str, Any]) -> Tuple[float, float]:
+        """(name similarity, evidence) for a pair of records"""
+        metadata_a, metadata_b = a.get("metadata") or {}, b.get("metadata") or {}
+        name_similarity = SequenceMatcher(None, normalize_name(metadata_a.get("name")),
+                                          normalize_name(metadata_b.get("name"))).ratio()
+        company_a = " ".join(tokenize(metadata_a.get("company") or ""))
+        company_b = " ".join(tokenize(metadata_b.get("company") or ""))
+        evidence = 1.0 if company_a and company_a == company_b else 0.0
+        evidence += _jaccard({str(skill).lower() for skill in metadata_a.get("skills") or []},
+                             {str(skill).lower() for skill in metadata_b.get("skills") or []})
+        evidence += _jaccard(set(tokenize(metadata_a.get("bio") or "")), set(tokenize(metadata_b.get("bio") or "")))
+        return name_similarity, evidence
+
+    def same_person(self, a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+        name_similarity, evidence = self.match_score(a, b)
+        return name_similarity >= self.name_threshold and evidence >= self.min_evidence
+
+    def resolve(self, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merged candidates, in order of each cluster's first record"""
+        parent = list(range(len(candidates)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        # Per record, kept up to date at each cluster root: the accounts the cluster holds
+        identities = [_identities(candidate) for candidate in candidates]
+
+        def union(i: int, j: int):
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                root, child = min(root_i, root_j), max(root_i, root_j)
+                parent[child] = root
+                for key, value in identities[child].items():
+                    identities[root].setdefault(key, value)
+
+        def conflicting(i: int, j: int) -> bool:
+            """Whether the two clusters hold different accounts on the same host or id namespace"""
+            identities_i, identities_j = identities[find(i)], identities[find(j)]
+            return any(identities_j.get(key, value) != value for key, value in identities_i.items())
+
+        strong_blocks: Dict[str, List[int]] = {}
+        fuzzy_blocks: Dict[str, List[int]] = {}
+        for i, candidate in enumerate(candidates):
+            strong, fuzzy = blocking_keys(candidate)
+            for key in strong:
+                strong_blocks.setdefault(key, []).append(i)
+            for key in fuzzy:
+                fuzzy_blocks.setdefault(key, []).append(i)
+
+        for members in strong_blocks.values():
+            for j in members[1:]:
+                if not conflicting(members[0], j):
+                    union(members[0], j)
+        for members in fuzzy_blocks.values():
+            if len(members) < 2 or len(members) > self.max_block_size:
+                continue
+            for x, i in enumerate(members):
+                for j in members[x + 1:]:
+                    if (find(i) != find(j) and not conflicting(i, j)
+                            and self.same_person(candidates[i], candidates[j])):
+                        union(i, j)
+
+        clusters: Dict[int, List[int]] = {}
+        for i in range(len(candidates)):
+            clusters.setdefault(find(i), []).append(i)
+        return [self._merge([candidates[i] for i in members]) for _, members in sorted(clusters.items())]
+
+    @staticmethod
+    def _merge(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """One canonical candidate: the preferred record, gaps filled from the others"""
+        if len(records) == 1:
+            return records[0]
+        ordered = sorted(records, key=lambda record: SOURCE_PRIORITY.get(record.get("source"), len(SOURCE_PRIORITY)))
+        canonical = dict(ordered[0])
+        metadata = dict(canonical.get("metadata") or {})
+        skills = list(metadata.get("skills") or [])
+        for record in ordered[1:]:
+            for field, value in (record.get("metadata") or {}).items():
+                if field == "skills":
+                    skills.extend(skill for skill in value or [] if skill not in skills)
+                elif value and not metadata.get(field):
+                    metadata[field] = value
+        metadata["skills"] = skills
+        metadata["merged_ids"] = [str(record.get("id", "")) for record in records]
+        canonical["metadata"] = metadata
+        canonical["document"] = candidate_document(metadata)
+        canonical["provenance"] = [
+            {"id": str(record.get("id", "")), "source": record.get("source", "Unknown"),
+             "profile_url": (record.get("metadata") or {}).get("profile_url", "")}
+            for record in records
+        ]
+        return canonical
@@ -0,0 +1,89 @@
+from typing import Iterable, Tuple, List
+import numpy as np
+
+
+def _top_k_per_row(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Column indices and values of the k largest entries in each row, best first"""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.zeros((scores.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(np.float32)
+    idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    values = np.take_along_axis(scores, idx, axis=1)
+    order = np.argsort(-values, axis=1)
+    return np.take_along_axis(idx, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+
+def _merge(best_idx: np.ndarray, best_values: np.ndarray, idx: np.ndarray, values: np.ndarray,
+           k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge two per-row top-k lists (indices in the same id space) into one"""
+    all_idx = np.concatenate([best_idx, idx], axis=1)
+    all_values = np.concatenate([best_values, values], axis=1)
+    pick, merged_values = _top_k_per_row(all_values, k)
+    return np.take_along_axis(all_idx, pick, axis=1), merged_values
+
+
+def match_top_k(queries: np.ndarray, blocks: Iterable[Tuple[np.ndarray, np.ndarray]], k_per_query: int,
+                k_per_target: int, query_block: int = 256):
+    """Score every query vector against every target vector, one bounded block at a time.
+
+    `queries` is a (Q, dim) matrix (e.g. jobs). `blocks` yields
+    (target_rows, target_vectors) pairs covering the targets (e.g. candidates),
+    so peak memory is one target block times one query block of scores.
+
+    Returns (query_rows, query_scores, target_rows, target_queries, target_scores):
+    the best `k_per_query` target rows for each query, and for every target
+    row seen its best `k_per_target` query indices, all sorted best first.
+    Each list has min(k, number of targets or queries) real entries.
+    """
+    n_queries = len(queries)
+    n_targets = 0
+    query_best_rows = np.zeros((n_queries, 0), dtype=np.int64)
+    query_best_scores = np.zeros((n_queries, 0), dtype=np.float32)
+    target_rows: List[np.ndarray] = []
+    target_queries: List[np.ndarray] = []
+    target_scores: List[np.ndarray] = []
+
+    for rows, vectors in blocks:
+        if not len(rows):
+            continue
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n_targets += len(rows)
+        block_best_queries = np.zeros((len(rows), 0), dtype=np.int64)
+        block_best_scores = np.zeros((len(rows), 0), dtype=np.float32)
+
+        for start in range(0, n_queries, query_block):
+            scores = vectors @ queries[start:start + query_block].T  # (targets, queries)
+
+            idx, values = _top_k_per_row(scores, k_per_target)
+            block_best_queries, block_best_scores = _merge(
+                block_best_queries, block_best_scores, idx + start, values, k_per_target
+            )
+
+            idx, values = _top_k_per_row(scores.T, k_per_query)
+            merged_rows, merged_scores = _merge(
+                query_best_rows[start:start + query_block], query_best_scores[start:start + query_block],
+                rows[idx], values, k_per_query
+            )
+            if merged_rows.shape[1] != query_best_rows.shape[1]:
+                # The running top-k only widens while fewer than k targets have been seen
+                width = merged_rows.shape[1]
+                query_best_rows = np.pad(query_best_rows, ((0, 0), (0, width - query_best_rows.shape[1])))
+                query_best_scores = np.pad(query_best_scores, ((0, 0), (0, width - query_best_scores.shape[1])),
+                                           constant_values=-np.inf)
+            query_best_rows[start:start + query_block] = merged_rows
+            query_best_scores[start:start + query_block] = merged_scores
+
+        target_rows.append(rows)
+        target_queries.append(block_best_queries)
+        target_scores.append(block_best_scores)
+
+    # Query blocks not yet merged when the running top-k widened were padded with (row 0, -inf)
+    # placeholders; every query has seen the same min(k, targets) real entries, so cut them off
+    width = min(k_per_query, n_targets)
+    query_best_rows, query_best_scores = query_best_rows[:, :width], query_best_scores[:, :width]
+    if target_rows:
+        return (query_best_rows, query_best_scores, np.concatenate(target_rows),
+                np.concatenate(target_queries), np.concatenate(target_scores))
+    return (query_best_rows, query_best_scores, np.zeros(0, dtype=np.int64),
+            np.zeros((0, 0), dtype=np.int64), np.zeros((0, 0), dtype=np.float32))
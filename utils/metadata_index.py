@@ -0,0 +1,107 @@
+from typing import Dict, Any, Iterable, Tuple, Optional, Set, List
+
+FILTER_FIELDS = ("skills_any", "skills_all", "location", "source", "company")
+
+# Id prefixes written by ExternalSourcer, used when older records lack metadata["source"]
+SOURCE_PREFIXES = {"gh_": "GitHub", "li_": "LinkedIn"}
+
+
+def _normalize(value: Any) -> str:
+    return " ".join(str(value).lower().split()) if value else ""
+
+
+def _location_keys(location: Any) -> List[str]:
+    """The full location plus each comma-separated part and word.
+
+    This lets "India" match "Bengaluru, India" and "Mumbai" match "Navi Mumbai".
+    """
+    full = _normalize(location)
+    if not full:
+        return []
+    parts = [part.strip() for part in full.split(",") if part.strip()]
+    words = [word for part in parts for word in part.split()]
+    return list(dict.fromkeys([full] + parts + words))
+
+
+class MetadataIndex:
+    """Secondary indexes over candidate metadata: field value -> set of ids.
+
+    Used to resolve structured filters (skills_any, skills_all, location,
+    source, company) to the eligible ids before any ranking happens.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, Set[str]]] = {"skills": {}, "location": {}, "source": {}, "company": {}}
+        self.doc_keys: Dict[str, List[Tuple[str, str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.doc_keys)
+
+    def _keys(self, doc_id: str, metadata: Dict[str, Any]) -> List[Tuple[str, str]]:
+        keys = [("skills", _normalize(skill)) for skill in metadata.get("skills") or [] if _normalize(skill)]
+        keys += [("location", key) for key in _location_keys(metadata.get("location"))]
+        if _normalize(metadata.get("company")):
+            keys.append(("company", _normalize(metadata.get("company"))))
+        source = metadata.get("source") or next(
+            (name for prefix, name in SOURCE_PREFIXES.items() if doc_id.startswith(prefix)), "Internal Database"
+        )
+        keys.append(("source", _normalize(source)))
+        return keys
+
+    def add(self, doc_id: str, metadata: Dict[str, Any]):
+        """Index a record's metadata, replacing any previous version"""
+        self.remove(doc_id)
+        keys = self._keys(doc_id, metadata or {})
+        for field, value in keys:
+            self.postings[field].setdefault(value, set()).add(doc_id)
+        self.doc_keys[doc_id] = keys
+
+    def add_many(self, docs: Iterable[Tuple[str, Dict[str, Any]]]):
+        for doc_id, metadata in docs:
+            self.add(doc_id, metadata)
+
+    def remove(self, doc_id: str):
+        for field, value in self.doc_keys.pop(doc_id, []):
+            ids = self.postings[field].get(value)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del self.postings[field][value]
+
+    def filter(self, filters: Optional[Dict[str, Any]]) -> Optional[Set[str]]:
+        """Resolve filters to the set of matching ids, or None if no filter is active.
+
+        `skills_any`/`skills_all` take lists of skills; `location`, `source`
+        and `company` take a single value or a list of accepted values.
+        """
+        if not filters:
+            return None
+        unknown = set(filters) - set(FILTER_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown candidate filters: {', '.join(sorted(unknown))}")
+
+        constraints: List[Set[str]] = []
+        for name, value in filters.items():
+            if not value:
+                continue
+            values = [value] if isinstance(value, str) else list(value)
+            if name == "skills_all":
+                constraints.extend(self.postings["skills"].get(_normalize(skill), set()) for skill in values)
+                continue
+            field = "skills" if name == "skills_any" else name
+            matched: Set[str] = set()
+            for item in values:
+                for key in (_location_keys(item)[:1] if field == "location" else [_normalize(item)]):
+                    matched |= self.postings[field].get(key, set())
+            constraints.append(matched)
+
+        if not constraints:
+            return None
+        # Intersect smallest-first so the work is bounded by the most selective filter
+        constraints.sort(key=len)
+        eligible = set(constraints[0])
+        for ids in constraints[1:]:
+            eligible &= ids
+            if not eligible:
+                break
+        return eligible
@@ -1,6 +1,9 @@
 from langchain.prompts import PromptTemplate
 
 # Sourcing Agent Prompts
+# Bump when SOURCING_PROMPT changes so memoized search queries are regenerated
+PROMPT_VERSION = "1"
+
 SOURCING_PROMPT = PromptTemplate(
     input_variables=["job_description", "requirements"],
     template="""You are an expert talent sourcing agent. Analyze the following job description and requirements to find suitable candidates:
@@ -0,0 +1,166 @@
+from typing import Dict, Any, Callable, Optional, Tuple
+import random
+import threading
+import time
+import requests
+
+
+class TokenBucket:
+    """Token bucket that hands out request slots at a steady rate.
+
+    `reserve` takes a slot under the lock and the caller sleeps outside it, so
+    concurrent callers queue up fairly instead of waking up together.
+    """
+
+    def __init__(self, capacity: float, per_seconds: float):
+        self.capacity = float(capacity)
+        self.base_rate = capacity / per_seconds
+        self.rate = self.base_rate
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.reset_at: Optional[float] = None  # when the server's current window ends
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if self.reset_at is not None and now >= self.reset_at:
+            # A new server window: full budget, minus slots already promised to waiting callers
+            self.tokens = self.capacity + min(self.tokens, 0.0)
+            self.rate = self.base_rate
+            self.reset_at = None
+        else:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take one token and return how long the caller must wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = 0.0
+            if self.tokens < 0:
+                wait = -self.tokens / self.rate
+                if self.reset_at is not None:
+                    wait = min(wait, self.reset_at - now)
+            return max(wait, self.blocked_until - now)
+
+    def sync(self, remaining: int, reset_in: Optional[float]):
+        """Align the bucket with the server's view of the remaining budget.
+
+        The refill rate is set to spread `remaining` over the time left in the
+        window, so a spare quota is used quickly and a nearly spent one slowly.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens = min(self.tokens, float(remaining))
+            if reset_in is not None and reset_in > 0:
+                self.reset_at = now + reset_in
+                self.rate = max(remaining / reset_in, 1e-3)
+
+    def block(self, seconds: float):
+        """Hold back every caller of this bucket for `seconds`"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RateLimiter:
+    """Shared, header-driven rate limiter with one token bucket per endpoint class.
+
+    `limits` maps an endpoint class (e.g. "search", "core") to its
+    (requests, per_seconds) budget. Responses feed `X-RateLimit-Remaining`,
+    `X-RateLimit-Reset` and `Retry-After` back into the matching bucket, and
+    429 or rate-limit 403 responses are retried with exponential backoff and
+    full jitter.
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[float, float]], max_retries: int = 4,
+                 base_delay: float = 1.0, max_delay: float = 60.0):
+        self.buckets = {endpoint: TokenBucket(*limit) for endpoint, limit in limits.items()}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._stats: Dict[str, Dict[str, float]] = {
+            endpoint: {"requests": 0, "throttled": 0, "throttled_seconds": 0.0, "retries": 0}
+            for endpoint in self.buckets
+        }
+        self._stats_lock = threading.Lock()
+
+    def _record(self, endpoint: str, **deltas: float):
+        with self._stats_lock:
+            stats = self._stats[endpoint]
+            for name, delta in deltas.items():
+                stats[name] += delta
+
+    def _sleep(self, endpoint: str, seconds: float):
+        if seconds > 0:
+            self._record(endpoint, throttled=1, throttled_seconds=seconds)
+            time.sleep(seconds)
+
+    def acquire(self, endpoint: str):
+        """Block until a request to `endpoint` may be sent"""
+        self._sleep(endpoint, self.buckets[endpoint].reserve())
+        self._record(endpoint, requests=1)
+
+    def update(self, endpoint: str, headers: Dict[str, str]):
+        """Feed a response's rate-limit headers back into the endpoint's bucket"""
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+        reset = headers.get("X-RateLimit-Reset")
+        reset_in = float(reset) - time.time() if reset else None
+        self.buckets[endpoint].sync(int(remaining), reset_in)
+
+    def _is_rate_limited(self, response: requests.Response) -> bool:
+        if response.status_code == 429:
+            return True
+        if response.status_code != 403:
+            return False
+        # GitHub signals both primary and secondary limits with a 403
+        return (response.headers.get("X-RateLimit-Remaining") == "0"
+                or "Retry-After" in response.headers
+                or "rate limit" in response.text.lower())
+
+    def backoff_delay(self, attempt: int, headers: Dict[str, str]) -> float:
+        """Retry-After if the server sent one, else capped exponential backoff with full jitter"""
+        retry_after = headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.max_delay)
+            except ValueError:
+                pass
+        reset = headers.get("X-RateLimit-Reset")
+        if headers.get("X-RateLimit-Remaining") == "0" and reset:
+            return min(max(float(reset) - time.time(), 0.0), self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def request(self, endpoint: str, send: Callable[[], requests.Response]) -> requests.Response:
+        """Send a request through the limiter, retrying rate-limited responses.
+
+        Returns the last response; the caller decides how to treat errors.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(endpoint)
+            response = send()
+            self.update(endpoint, response.headers)
+            if attempt == self.max_retries or not self._is_rate_limited(response):
+                return response
+            delay = self.backoff_delay(attempt, response.headers)
+            # Block the whole bucket so other threads do not keep hitting the limit
+            self.buckets[endpoint].block(delay)
+            self._record(endpoint, retries=1)
+            self._sleep(endpoint, delay)
+        return response
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-endpoint request, throttle and retry counters"""
+        with self._stats_lock:
+            return {endpoint: dict(stats) for endpoint, stats in self._stats.items()}
+
+
+# GitHub's documented budgets: search is 30/min with a token (10 without), core is 5000/h (60 without),
+# GraphQL is 5000 points/h and needs a token
+GITHUB_LIMITS = {"search": (30, 60), "core": (5000, 3600), "graphql": (5000, 3600)}
+GITHUB_ANONYMOUS_LIMITS = {"search": (10, 60), "core": (60, 3600), "graphql": (5000, 3600)}
+LINKEDIN_LIMITS = {"linkedin": (100, 60)}
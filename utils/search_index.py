@@ -0,0 +1,91 @@
+from typing import Dict, List, Tuple, Iterable, Optional, Set
+from collections import Counter
+import heapq
+import math
+import re
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase terms, keeping tech names like c++, c# and node.js intact"""
+    return [token.rstrip('.') for token in TOKEN_PATTERN.findall((text or "").lower())]
+
+
+class InvertedIndex:
+    """Token-level inverted index with Okapi BM25 ranking.
+
+    Postings map each term to {doc_id: term frequency}, so a query only
+    touches the documents that contain at least one of its terms.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_terms: Dict[str, Counter] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.doc_lengths
+
+    def add(self, doc_id: str, text: str):
+        """Index a document, replacing any previous version with the same id"""
+        if doc_id in self.doc_lengths:
+            self.remove(doc_id)
+
+        terms = Counter(tokenize(text))
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+
+        length = sum(terms.values())
+        self.doc_terms[doc_id] = terms
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+
+    def add_many(self, docs: Iterable[Tuple[str, str]]):
+        for doc_id, text in docs:
+            self.add(doc_id, text)
+
+    def remove(self, doc_id: str):
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(doc_id)
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        n = len(self.doc_lengths)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, k: int = 5, allowed: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+        """Return the top-k (doc_id, BM25 score) pairs, best first, optionally only among `allowed` ids"""
+        if not self.doc_lengths or k <= 0:
+            return []
+
+        avg_length = self.total_length / len(self.doc_lengths) or 1.0
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = self.idf(term)
+            if allowed is not None and len(allowed) < len(posting):
+                # Walk the smaller side: only eligible docs are ever scored
+                posting = {doc_id: posting[doc_id] for doc_id in allowed if doc_id in posting}
+            for doc_id, tf in posting.items():
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
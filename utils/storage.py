@@ -0,0 +1,698 @@
+from typing import Dict, Any, Optional, List, Tuple, Iterable, Set
+import atexit
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from utils.search_index import tokenize
+
+
+class CollectionStore:
+    """Base class for a persisted id -> record collection with a background flusher.
+
+    Subclasses implement the storage format; this class owns the flusher
+    thread that calls `flush()` every `flush_interval` seconds, or sooner
+    when `_wakeup` is set, and the `close()`/atexit handling.
+    """
+
+    def __init__(self, flush_interval: float = 2.0, max_pending: int = 100):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.generation = 0  # Bumped every time the data is (re)loaded from disk
+
+        self._lock = threading.RLock()
+        self._closed = False
+        self._wakeup = threading.Event()
+
+    def _start_flusher(self):
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                self._maintain()
+            except Exception as e:
+                print(f"Error flushing {self.path}: {e}")
+
+    def _maintain(self):
+        """Periodic housekeeping hook run by the flusher after each flush"""
+
+    def refresh(self) -> bool:
+        """Reload from disk if another writer changed the data; return True if reloaded"""
+        return False
+
+    def signature(self) -> Any:
+        """JSON-serializable token identifying the persisted state, or None if unknown.
+
+        Derived data saved alongside the collection (e.g. embedding matrices)
+        records it so a later process can tell whether that data is current.
+        """
+        return None
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        raise NotImplementedError
+
+    def get_many(self, record_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Look up several records at once; missing ids are left out of the result"""
+        found = {}
+        for record_id in record_ids:
+            record = self.get(record_id)
+            if record is not None:
+                found[record_id] = record
+        return found
+
+    def put(self, record_id: str, record: Dict[str, Any]):
+        raise NotImplementedError
+
+    def put_many(self, records: Dict[str, Dict[str, Any]]):
+        """Write several records and persist them once"""
+        with self._lock:
+            for record_id, record in records.items():
+                self.put(record_id, record)
+            self.flush()
+
+    def flush(self):
+        raise NotImplementedError
+
+    def close(self):
+        """Flush pending writes and stop the background flusher"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        if threading.current_thread() is not self._flusher:
+            # Let an in-flight flush or compaction finish before the final flush
+            self._flusher.join()
+        self.flush()
+
+
+class JsonCollectionStore(CollectionStore):
+    """Resident copy of one JSON collection file with write-behind persistence.
+
+    The file is parsed once and kept in memory. It is only re-read when its
+    mtime/size changes on disk (e.g. another process wrote it). Writes go to
+    memory immediately and are flushed by a background thread every
+    `flush_interval` seconds, or as soon as `max_pending` writes are queued,
+    so a crash loses at most that window of writes.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 2.0, max_pending: int = 100):
+        super().__init__(flush_interval, max_pending)
+        self.path = path
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._file_stamp: Optional[Tuple[int, int]] = None
+
+        if not os.path.exists(self.path):
+            self._write_file({})
+        self._load()
+        self._start_flusher()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self):
+        """Read the file from disk, re-applying any writes not yet flushed"""
+        stamp = self._stat()
+        try:
+            with open(self.path, 'r') as f:
+                records = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            print(f"Error loading {self.path}: {e}")
+            records = {}
+        records.update(self._pending)
+        self._records = records
+        self._file_stamp = stamp
+        self.generation += 1
+
+    def _write_file(self, records: Dict[str, Dict[str, Any]]):
+        """Atomically replace the file so readers never see a partial write.
+
+        Each write gets its own temp file in the same directory, so two
+        processes flushing at once cannot truncate each other's copy.
+        """
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.path) + ".",
+                                        suffix=".tmp", dir=os.path.dirname(self.path) or ".")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(records, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def refresh(self) -> bool:
+        """Reload from disk if the file changed since it was last read or written"""
+        with self._lock:
+            if self._stat() != self._file_stamp:
+                self._load()
+                return True
+            return False
+
+    def signature(self) -> Any:
+        with self._lock:
+            self.refresh()
+            return None if self._pending or self._file_stamp is None else list(self._file_stamp)
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self.refresh()
+            return self._records.get(record_id)
+
+    def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            self.refresh()
+            return list(self._records.items())
+
+    def __contains__(self, record_id: str) -> bool:
+        with self._lock:
+            self.refresh()
+            return record_id in self._records
+
+    def __len__(self) -> int:
+        with self._lock:
+            self.refresh()
+            return len(self._records)
+
+    def put(self, record_id: str, record: Dict[str, Any]):
+        with self._lock:
+            self.refresh()
+            self._records[record_id] = record
+            self._pending[record_id] = record
+            if self._closed:
+                self.flush()
+            elif len(self._pending) >= self.max_pending:
+                self._wakeup.set()
+
+    def get_many(self, record_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            self.refresh()
+            return {record_id: self._records[record_id] for record_id in record_ids if record_id in self._records}
+
+    def put_many(self, records: Dict[str, Dict[str, Any]]):
+        """Apply all records in memory, then rewrite the file once"""
+        with self._lock:
+            self.refresh()
+            self._records.update(records)
+            self._pending.update(records)
+            self.flush()
+
+    def flush(self):
+        """Write all pending changes to disk"""
+        with self._lock:
+            if not self._pending:
+                return
+            # Pick up concurrent external writes so they are not clobbered
+            self.refresh()
+            self._write_file(self._records)
+            self._pending.clear()
+            self._file_stamp = self._stat()
+
+
+class LogCollectionStore(CollectionStore):
+    """Append-only JSONL segment log with an in-memory offset index.
+
+    Every put is a single O(1) append of `{"id": ..., "record": ...}` to the
+    active segment; the index maps each id to the (segment, offset, length)
+    of its latest version, so point lookups are one seek + read and records
+    are not kept resident. Appends reach the OS immediately and are fsynced
+    by the background flusher. When superseded versions make up more than
+    `compact_ratio` of the log, the active segment is sealed and the sealed
+    segments are rewritten into one compacted segment in a background thread.
+    """
+
+    SEGMENT_SUFFIX = ".jsonl"
+
+    def __init__(self, path: str, flush_interval: float = 2.0, max_pending: int = 100,
+                 seed_path: Optional[str] = None, compact_ratio: float = 0.5,
+                 compact_min_bytes: int = 1 << 20):
+        super().__init__(flush_interval, max_pending)
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.compact_min_bytes = compact_min_bytes
+
+        self._index: Dict[str, Tuple[int, int, int]] = {}
+        self._readers: Dict[int, Any] = {}
+        self._writer = None
+        self._active = 0
+        self._unsynced = 0
+        self._total_bytes = 0
+        self._live_bytes = 0
+        self._compacting = False
+        self._log_stamp: Optional[Tuple[Tuple[int, ...], int]] = None
+
+        os.makedirs(self.path, exist_ok=True)
+        for name in os.listdir(self.path):
+            if name.endswith(".compact"):
+                # Leftover from an interrupted compaction; the source segments are intact
+                os.remove(os.path.join(self.path, name))
+
+        self._load()
+        if not self._index and seed_path and os.path.exists(seed_path):
+            self._import_json(seed_path)
+        self._start_flusher()
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f"{segment:08d}{self.SEGMENT_SUFFIX}")
+
+    def _segments(self) -> List[int]:
+        return sorted(
+            int(name[:-len(self.SEGMENT_SUFFIX)])
+            for name in os.listdir(self.path)
+            if name.endswith(self.SEGMENT_SUFFIX)
+        )
+
+    def _stamp(self) -> Tuple[Tuple[int, ...], int]:
+        segments = tuple(self._segments())
+        try:
+            active_size = os.path.getsize(self._segment_path(segments[-1])) if segments else 0
+        except FileNotFoundError:
+            active_size = 0
+        return (segments, active_size)
+
+    def _load(self):
+        """Replay all segments in order to rebuild the offset index"""
+        for reader in self._readers.values():
+            reader.close()
+        self._readers = {}
+        if self._writer:
+            self._writer.close()
+
+        self._index = {}
+        self._total_bytes = 0
+        segments = self._segments()
+        for segment in segments:
+            offset = 0
+            with open(self._segment_path(segment), 'rb') as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Torn write from a crash; the record was never acknowledged
+                    try:
+                        record_id = json.loads(line)["id"]
+                    except (ValueError, KeyError):
+                        record_id = None
+                    if record_id is not None:
+                        self._index[record_id] = (segment, offset, len(line))
+                    offset += len(line)
+            self._total_bytes += offset
+            if segment == segments[-1] and offset != os.path.getsize(self._segment_path(segment)):
+                with open(self._segment_path(segment), 'ab') as f:
+                    f.truncate(offset)
+
+        self._live_bytes = sum(length for _, _, length in self._index.values())
+        self._active = segments[-1] if segments else 1
+        self._writer = open(self._segment_path(self._active), 'ab', buffering=0)
+        self._log_stamp = self._stamp()
+        self.generation += 1
+
+    def _import_json(self, seed_path: str):
+        """One-shot import of an existing JSON collection file into an empty log"""
+        try:
+            with open(seed_path, 'r') as f:
+                records = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error importing {seed_path}: {e}")
+            return
+        self.put_many(records)
+
+    def refresh(self) -> bool:
+        """Replay the log if another process appended to or compacted it"""
+        with self._lock:
+            if self._compacting:
+                return False
+            if self._stamp() != self._log_stamp:
+                self._load()
+                return True
+            return False
+
+    def signature(self) -> Any:
+        with self._lock:
+            if self._compacting:
+                return None
+            self.refresh()
+            segments, size = self._log_stamp
+            return [list(segments), size]
+
+    def _read(self, location: Tuple[int, int, int]) -> Dict[str, Any]:
+        segment, offset, length = location
+        reader = self._readers.get(segment)
+        if reader is None:
+            reader = open(self._segment_path(segment), 'rb')
+            self._readers[segment] = reader
+        reader.seek(offset)
+        return json.loads(reader.read(length))["record"]
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self.refresh()
+            location = self._index.get(record_id)
+            return self._read(location) if location else None
+
+    def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            self.refresh()
+            # Read in file order so the scan is sequential
+            locations = sorted(self._index.items(), key=lambda item: item[1])
+            return [(record_id, self._read(location)) for record_id, location in locations]
+
+    def __contains__(self, record_id: str) -> bool:
+        with self._lock:
+            self.refresh()
+            return record_id in self._index
+
+    def __len__(self) -> int:
+        with self._lock:
+            self.refresh()
+            return len(self._index)
+
+    def put(self, record_id: str, record: Dict[str, Any]):
+        with self._lock:
+            self._append({record_id: record})
+            if self._closed:
+                self.flush()
+            elif self._unsynced >= self.max_pending:
+                self._wakeup.set()
+
+    def put_many(self, records: Dict[str, Dict[str, Any]]):
+        """Append all records with a single write, then fsync once"""
+        with self._lock:
+            self._append(records)
+            self.flush()
+
+    def _append(self, records: Dict[str, Dict[str, Any]]):
+        with self._lock:
+            self.refresh()
+            start = offset = self._writer.tell()
+            chunks = []
+            for record_id, record in records.items():
+                line = (json.dumps({"id": record_id, "record": record}) + "\n").encode("utf-8")
+                previous = self._index.get(record_id)
+                if previous:
+                    self._live_bytes -= previous[2]
+                self._index[record_id] = (self._active, offset, len(line))
+                self._live_bytes += len(line)
+                offset += len(line)
+                chunks.append(line)
+            data = memoryview(b"".join(chunks))
+            while data:
+                data = data[self._writer.write(data):]  # Unbuffered writes may be partial
+            self._total_bytes += offset - start
+            self._log_stamp = (self._log_stamp[0], offset)
+            self._unsynced += len(chunks)
+
+    def flush(self):
+        """fsync appended records so they survive a machine crash"""
+        with self._lock:
+            if self._unsynced and self._writer:
+                os.fsync(self._writer.fileno())
+                self._unsynced = 0
+
+    def _maintain(self):
+        if self.needs_compaction():
+            self.compact()
+
+    def needs_compaction(self) -> bool:
+        garbage = self._total_bytes - self._live_bytes
+        return (not self._compacting and self._total_bytes >= self.compact_min_bytes
+                and garbage > self.compact_ratio * self._total_bytes)
+
+    def compact(self):
+        """Rewrite sealed segments into one segment holding only the latest version of each record"""
+        with self._lock:
+            if self._compacting:
+                return
+            self._compacting = True
+            # Seal the active segment; new appends go to a fresh one while we compact
+            self.flush()
+            self._writer.close()
+            sealed = self._active
+            self._active += 1
+            self._writer = open(self._segment_path(self._active), 'ab', buffering=0)
+            snapshot = sorted(
+                ((record_id, location) for record_id, location in self._index.items() if location[0] <= sealed),
+                key=lambda item: item[1]
+            )
+
+        try:
+            compact_path = self._segment_path(sealed) + ".compact"
+            moved: Dict[str, Tuple[Tuple[int, int, int], Tuple[int, int, int]]] = {}
+            sources: Dict[int, Any] = {}
+            offset = 0
+            with open(compact_path, 'wb') as out:
+                for record_id, location in snapshot:
+                    segment, source_offset, length = location
+                    if segment not in sources:
+                        sources[segment] = open(self._segment_path(segment), 'rb')
+                    sources[segment].seek(source_offset)
+                    out.write(sources[segment].read(length))
+                    moved[record_id] = (location, (sealed, offset, length))
+                    offset += length
+                out.flush()
+                os.fsync(out.fileno())
+            for source in sources.values():
+                source.close()
+
+            with self._lock:
+                # The compacted file holds the latest version of every record in segments <= sealed,
+                # so replacing the newest sealed segment first keeps a crash at any point recoverable
+                for segment in [s for s in self._readers if s <= sealed]:
+                    self._readers.pop(segment).close()
+                os.replace(compact_path, self._segment_path(sealed))
+                for segment in self._segments():
+                    if segment < sealed:
+                        os.remove(self._segment_path(segment))
+
+                for record_id, (old_location, new_location) in moved.items():
+                    if self._index.get(record_id) == old_location:
+                        self._index[record_id] = new_location
+                self._total_bytes = offset + self._writer.tell()
+                self._live_bytes = sum(length for _, _, length in self._index.values())
+                self._log_stamp = self._stamp()
+        finally:
+            self._compacting = False
+
+    def close(self):
+        """Flush pending writes, stop the background flusher and close file handles"""
+        if self._closed:
+            return
+        super().close()
+        with self._lock:
+            for reader in self._readers.values():
+                reader.close()
+            self._readers = {}
+            self._writer.close()
+
+
+class SQLiteCollectionStore(CollectionStore):
+    """One collection kept in a SQLite table with an FTS5 full-text index.
+
+    The database runs in WAL mode so readers (one connection per thread) never
+    block the single writer, and several processes can share the file. Point
+    lookups use the primary key and `search()` goes through FTS5 with BM25
+    ranking, so nothing ever rewrites or scans the whole collection.
+    """
+
+    text_search = True
+
+    def __init__(self, db_path: str, table: str, flush_interval: float = 2.0, max_pending: int = 100,
+                 seed_path: Optional[str] = None):
+        super().__init__(flush_interval, max_pending)
+        self.path = db_path
+        self.table = table
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._unsynced = 0
+
+        self._writer = self._connect()
+        self._writer.executescript(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                rowid INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                document TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+                document, content='{table}', content_rowid='rowid', tokenize="unicode61 tokenchars '+#'"
+            );
+            CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {table}_fts(rowid, document) VALUES (new.rowid, new.document);
+            END;
+            CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {table}_fts({table}_fts, rowid, document) VALUES ('delete', old.rowid, old.document);
+            END;
+            CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE ON {table} BEGIN
+                INSERT INTO {table}_fts({table}_fts, rowid, document) VALUES ('delete', old.rowid, old.document);
+                INSERT INTO {table}_fts(rowid, document) VALUES (new.rowid, new.document);
+            END;
+            CREATE TABLE IF NOT EXISTS collection_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL);
+            INSERT OR IGNORE INTO collection_versions(name, version) VALUES ('{table}', 0);
+            CREATE TRIGGER IF NOT EXISTS {table}_version_ai AFTER INSERT ON {table} BEGIN
+                UPDATE collection_versions SET version = version + 1 WHERE name = '{table}';
+            END;
+            CREATE TRIGGER IF NOT EXISTS {table}_version_au AFTER UPDATE ON {table} BEGIN
+                UPDATE collection_versions SET version = version + 1 WHERE name = '{table}';
+            END;
+            CREATE TRIGGER IF NOT EXISTS {table}_version_ad AFTER DELETE ON {table} BEGIN
+                UPDATE collection_versions SET version = version + 1 WHERE name = '{table}';
+            END;
+        """)
+        self._version = self._table_version()
+        self.generation = 1
+
+        if seed_path and os.path.exists(seed_path) and not len(self):
+            self.import_json(seed_path)
+        self._start_flusher()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        self._connections.append(connection)
+        return connection
+
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+        return connection
+
+    def import_json(self, json_path: str) -> int:
+        """One-shot migration of a `{id: {"document", "metadata"}}` JSON file into this table"""
+        try:
+            with open(json_path, 'r') as f:
+                records = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error importing {json_path}: {e}")
+            return 0
+        self.put_many(records)
+        return len(records)
+
+    def _table_version(self) -> int:
+        return self._writer.execute(
+            "SELECT version FROM collection_versions WHERE name = ?", (self.table,)
+        ).fetchone()[0]
+
+    def refresh(self) -> bool:
+        """Detect changes to this table made by other connections (e.g. another Streamlit process).
+
+        Compares the table's trigger-maintained counter rather than the
+        file-wide PRAGMA data_version, so writes to the other collections
+        sharing the file do not invalidate this one.
+        """
+        with self._lock:
+            version = self._table_version()
+            if version != self._version:
+                self._version = version
+                self.generation += 1
+                return True
+            return False
+
+    def signature(self) -> Any:
+        """Per-table change counter maintained by triggers, so it survives restarts"""
+        row = self._reader().execute(
+            "SELECT version FROM collection_versions WHERE name = ?", (self.table,)
+        ).fetchone()
+        return [row[0]] if row else None
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        row = self._reader().execute(
+            f"SELECT document, metadata FROM {self.table} WHERE id = ?", (record_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"document": row[0], "metadata": json.loads(row[1])}
+
+    def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        rows = self._reader().execute(f"SELECT id, document, metadata FROM {self.table} ORDER BY rowid")
+        return [(row[0], {"document": row[1], "metadata": json.loads(row[2])}) for row in rows]
+
+    def get_many(self, record_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        record_ids = list(record_ids)
+        found = {}
+        for start in range(0, len(record_ids), 500):
+            chunk = record_ids[start:start + 500]
+            rows = self._reader().execute(
+                f"SELECT id, document, metadata FROM {self.table} WHERE id IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            for row in rows:
+                found[row[0]] = {"document": row[1], "metadata": json.loads(row[2])}
+        return found
+
+    def __contains__(self, record_id: str) -> bool:
+        return self._reader().execute(
+            f"SELECT 1 FROM {self.table} WHERE id = ?", (record_id,)
+        ).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._reader().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def put(self, record_id: str, record: Dict[str, Any]):
+        self.put_many({record_id: record})
+        if self._unsynced >= self.max_pending:
+            self._wakeup.set()
+
+    def put_many(self, records: Dict[str, Dict[str, Any]]):
+        """Upsert all records in a single transaction"""
+        with self._lock, self._writer:
+            self._writer.executemany(
+                f"INSERT INTO {self.table}(id, document, metadata) VALUES (?, ?, ?) "
+                f"ON CONFLICT(id) DO UPDATE SET document=excluded.document, metadata=excluded.metadata",
+                [(record_id, record["document"], json.dumps(record["metadata"]))
+                 for record_id, record in records.items()]
+            )
+            # Every upserted row bumps the counter once; if nobody else wrote since we last looked,
+            # the new value is our own and must not look like an external change
+            version = self._table_version()
+            if version - len(records) == self._version:
+                self._version = version
+            self._unsynced += len(records)
+
+    def search(self, query: str, k: int = 5, allowed: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+        """Full-text search via FTS5; returns (id, BM25 score) pairs, best first, optionally only among `allowed` ids"""
+        terms = tokenize(query)
+        if not terms or k <= 0:
+            return []
+        # Quote every term so FTS5 operators in user/LLM text are taken literally
+        match = " OR ".join('"{}"'.format(term.replace('"', '""')) for term in dict.fromkeys(terms))
+        sql = (f"SELECT t.id, bm25({self.table}_fts) AS score FROM {self.table}_fts "
+               f"JOIN {self.table} t ON t.rowid = {self.table}_fts.rowid "
+               f"WHERE {self.table}_fts MATCH ? ORDER BY score")
+        if allowed is None:
+            rows = self._reader().execute(sql + " LIMIT ?", (match, k))
+        else:
+            # Matches stream back in rank order; stop as soon as k eligible ones are seen
+            rows = (row for row in self._reader().execute(sql, (match,)) if row[0] in allowed)
+        # FTS5's bm25() is negated so that smaller is better
+        return [(row[0], -row[1]) for _, row in zip(range(k), rows)]
+
+    def flush(self):
+        """Checkpoint the WAL into the main database file"""
+        with self._lock:
+            if self._unsynced:
+                self._writer.execute("PRAGMA wal_checkpoint(PASSIVE)")
+                self._unsynced = 0
+
+    def close(self):
+        """Checkpoint, stop the background flusher and close all connections"""
+        if self._closed:
+            return
+        super().close()
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []